@@ -5,7 +5,7 @@ Loads settings from environment variables with validation.
 
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 
 class Settings(BaseSettings):
@@ -33,6 +33,8 @@ class Settings(BaseSettings):
     database_connection_string: str = Field(
         default="", description="Azure SQL connection string"
     )
+    db_pool_min_size: int = Field(default=5, description="Connections kept open in the DB pool")
+    db_pool_max_size: int = Field(default=20, description="Maximum connections in the DB pool")
 
     # Application Settings
     confidence_threshold: float = Field(
@@ -45,14 +47,40 @@ class Settings(BaseSettings):
         default="pdf,png,jpg,jpeg,tiff,bmp",
         description="Comma-separated allowed file extensions",
     )
+    cors_origins: str = Field(
+        default="", description="Comma-separated origins allowed to call the API cross-origin"
+    )
+    batch_concurrency: int = Field(
+        default=8, description="Maximum documents processed concurrently per batch request"
+    )
+    kyc_max_batch: int = Field(
+        default=8, description="Maximum KYC forms sent to GPT-4o in one extraction request"
+    )
+    kyc_batch_wait_ms: int = Field(
+        default=50, description="Milliseconds to wait for more KYC forms before sending a batch"
+    )
+    preprocess_use_opencl: bool = Field(
+        default=False, description="Run image preprocessing on an OpenCL device when available"
+    )
+    status_refresh_interval_s: int = Field(
+        default=30, description="Seconds between background dependency status checks"
+    )
     log_level: str = Field(default="INFO", description="Logging level")
     environment: str = Field(default="development", description="Runtime environment")
 
-    @property
+    @cached_property
     def allowed_extensions_list(self) -> list[str]:
         return [ext.strip().lower() for ext in self.allowed_extensions.split(",")]
 
-    @property
+    @cached_property
+    def allowed_extensions_set(self) -> frozenset[str]:
+        return frozenset(self.allowed_extensions_list)
+
+    @cached_property
+    def cors_origins_list(self) -> list[str]:
+        return [o.strip() for o in self.cors_origins.split(",") if o.strip()]
+
+    @cached_property
     def max_file_size_bytes(self) -> int:
         return self.max_file_size_mb * 1024 * 1024
 
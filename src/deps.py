@@ -0,0 +1,85 @@
+"""
+FastAPI dependency providers.
+Resolves shared application state (settings, services) for route handlers.
+
+Services are process-wide singletons built on first use by lru_cache'd
+factories. Azure SDK, OpenAI and OpenCV are imported inside the factories
+so that app startup and health-probe-only workers don't pay for them.
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from fastapi import Request
+
+from .config import Settings, get_settings
+
+if TYPE_CHECKING:
+    from .services.classifier import DocumentClassifier
+    from .services.extractor import DocumentExtractor
+    from .services.cheque_processor import ChequeProcessor
+    from .services.kyc_processor import KYCProcessor
+    from .services.invoice_processor import InvoiceProcessor
+    from .services.validator import KYCAMLValidator
+    from .services.storage import DocumentStorage
+    from .services.status import StatusCache
+    from .utils.image_preprocessing import ImagePreprocessor
+
+
+def settings_dep(request: Request) -> Settings:
+    """Return the Settings instance resolved once at application startup."""
+    return request.app.state.settings
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> "DocumentStorage":
+    from .services.storage import DocumentStorage
+    return DocumentStorage()
+
+
+@lru_cache(maxsize=None)
+def get_status_cache() -> "StatusCache":
+    from .services.status import StatusCache
+    return StatusCache(get_storage())
+
+
+@lru_cache(maxsize=None)
+def get_classifier() -> "DocumentClassifier":
+    from .services.classifier import DocumentClassifier
+    return DocumentClassifier()
+
+
+@lru_cache(maxsize=None)
+def get_extractor() -> "DocumentExtractor":
+    from .services.extractor import DocumentExtractor
+    return DocumentExtractor()
+
+
+@lru_cache(maxsize=None)
+def get_cheque_processor() -> "ChequeProcessor":
+    from .services.cheque_processor import ChequeProcessor
+    return ChequeProcessor()
+
+
+@lru_cache(maxsize=None)
+def get_kyc_processor() -> "KYCProcessor":
+    from .services.kyc_processor import KYCProcessor
+    return KYCProcessor()
+
+
+@lru_cache(maxsize=None)
+def get_invoice_processor() -> "InvoiceProcessor":
+    from .services.invoice_processor import InvoiceProcessor
+    return InvoiceProcessor()
+
+
+@lru_cache(maxsize=None)
+def get_validator() -> "KYCAMLValidator":
+    from .services.validator import KYCAMLValidator
+    return KYCAMLValidator()
+
+
+@lru_cache(maxsize=None)
+def get_preprocessor() -> "ImagePreprocessor":
+    from .utils.image_preprocessing import ImagePreprocessor
+    return ImagePreprocessor(use_opencl=get_settings().preprocess_use_opencl)
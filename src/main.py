@@ -11,16 +11,19 @@ Run on Azure:  Deployed as Azure App Service (see README)
 """
 
 import os
+import asyncio
 import logging
 from pathlib import Path
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
+from .config import get_settings
+from .deps import get_kyc_processor, get_storage, get_status_cache
 from .routers import documents, health
-from .services.storage import DocumentStorage
+from .services.openai_client import close_openai_client
 
 # Configure logging
 logging.basicConfig(
@@ -39,12 +42,19 @@ STATIC_DIR = BASE_DIR / "static"
 async def lifespan(app: FastAPI):
     """Application startup and shutdown events."""
     logger.info("Starting Banking Document Intelligence Pipeline...")
-    storage = DocumentStorage()
-    await storage.initialize_tables()
+    app.state.settings = get_settings()
+    await get_storage().initialize_tables()
+    status_task = asyncio.create_task(get_status_cache().run())
     logger.info(f"Static files: {STATIC_DIR}")
     logger.info("Application ready — accepting requests")
     yield
     logger.info("Shutting down...")
+    status_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await status_task
+    await get_kyc_processor().close()
+    await get_storage().close()
+    await close_openai_client()
 
 
 app = FastAPI(
@@ -60,13 +70,14 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
-# CORS middleware
+# CORS middleware — explicit lists let Starlette precompute preflight headers.
+# The bundled web UI is served same-origin and needs no entry here.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origins=get_settings().cors_origins_list or ["http://localhost:3000"],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
 )
 
 # Register API routers
@@ -0,0 +1,24 @@
+"""
+One-pass index over a document's extracted fields, built once per
+document and shared by the type-specific processors and the validator.
+"""
+
+from .schemas import ExtractedField
+
+
+class FieldIndex:
+    """Extracted fields by name (last occurrence wins) plus the OCR text."""
+
+    __slots__ = ("fields", "by_name", "text")
+
+    def __init__(self, fields: list[ExtractedField]):
+        by_name: dict[str, ExtractedField] = {}
+        text_lines: list[str] = []
+        for field in fields:
+            by_name[field.field_name] = field
+            if field.field_name == "text_line" and field.value:
+                text_lines.append(field.value)
+
+        self.fields = fields
+        self.by_name = by_name
+        self.text = "\n".join(text_lines)
@@ -3,18 +3,26 @@ Pydantic models for request/response schemas.
 Defines structured data models for the banking document processing pipeline.
 """
 
-from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from datetime import datetime, timezone
+from typing import Any, Optional
 from .enums import DocumentType, ProcessingStatus, ValidationStatus
 
 
+def _utc_now() -> datetime:
+    """Timezone-aware replacement for the deprecated datetime.utcnow()."""
+    return datetime.now(timezone.utc)
+
+
 # ─── Extracted Field Model ──────────────────────────────────────────
 
 class ExtractedField(BaseModel):
     """A single extracted field with confidence score."""
     field_name: str = Field(..., description="Name of the extracted field")
     value: Optional[str] = Field(None, description="Extracted value")
+    structured_value: Optional[Any] = Field(
+        None, description="Structured payload (e.g. table cells) for non-scalar fields"
+    )
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score 0-1")
     bounding_box: Optional[list[float]] = Field(
         None, description="Bounding box coordinates [x1, y1, x2, y2]"
@@ -22,6 +30,10 @@ class ExtractedField(BaseModel):
     page_number: Optional[int] = Field(None, description="Page number where field was found")
 
 
+# Validates/serializes a whole list in one call instead of one model at a time
+EXTRACTED_FIELDS_ADAPTER = TypeAdapter(list[ExtractedField])
+
+
 # ─── Document Processing Request ────────────────────────────────────
 
 class DocumentProcessRequest(BaseModel):
@@ -33,6 +45,9 @@ class DocumentProcessRequest(BaseModel):
     callback_url: Optional[str] = Field(
         None, description="Webhook URL for async notification"
     )
+    include_raw_text: bool = Field(
+        default=False, description="Return full OCR text and store it as a separate blob"
+    )
 
 
 # ─── Invoice Extraction Result ──────────────────────────────────────
@@ -151,8 +166,11 @@ class DocumentProcessResponse(BaseModel):
     pages_processed: int = Field(default=1)
     needs_human_review: bool = Field(default=False)
     review_reason: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_utc_now)
     raw_text: Optional[str] = Field(None, description="Raw extracted text content")
+    file_hash: Optional[str] = Field(
+        None, description="Content hash of the uploaded file, used for deduplication"
+    )
 
 
 # ─── Batch Processing ───────────────────────────────────────────────
@@ -183,4 +201,4 @@ class HealthResponse(BaseModel):
     document_intelligence_status: str
     openai_status: str
     database_status: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=_utc_now)
@@ -3,28 +3,35 @@ Document Processing API Routes.
 Handles document upload, classification, extraction, and validation endpoints.
 """
 
+import gzip
 import time
+import asyncio
 import logging
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response
 from typing import Optional
 
-from ..config import get_settings
+from ..config import Settings
+from ..deps import (
+    settings_dep,
+    get_classifier,
+    get_extractor,
+    get_cheque_processor,
+    get_kyc_processor,
+    get_invoice_processor,
+    get_validator,
+    get_preprocessor,
+    get_storage,
+)
 from ..models.enums import DocumentType, ProcessingStatus
+from ..models.field_index import FieldIndex
 from ..models.schemas import (
     DocumentProcessResponse,
     BatchProcessResponse,
     ValidationResult,
 )
-from ..services.classifier import DocumentClassifier
-from ..services.extractor import DocumentExtractor
-from ..services.cheque_processor import ChequeProcessor
-from ..services.kyc_processor import KYCProcessor
-from ..services.invoice_processor import InvoiceProcessor
-from ..services.validator import KYCAMLValidator
 from ..services.storage import DocumentStorage
-from ..utils.image_preprocessing import ImagePreprocessor
 from ..utils.helpers import (
-    compute_file_hash,
+    new_file_hasher,
     validate_file_extension,
     get_file_size_mb,
 )
@@ -32,108 +39,149 @@ from ..utils.helpers import (
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/documents", tags=["Documents"])
 
-# Initialize services
-classifier = DocumentClassifier()
-extractor = DocumentExtractor()
-cheque_processor = ChequeProcessor()
-kyc_processor = KYCProcessor()
-invoice_processor = InvoiceProcessor()
-validator = KYCAMLValidator()
-storage = DocumentStorage()
-preprocessor = ImagePreprocessor()
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MB
+_IMG_EXTS = frozenset({"png", "jpg", "jpeg", "tiff", "bmp"})
 
 
-@router.post("/process", response_model=DocumentProcessResponse)
-async def process_document(
-    file: UploadFile = File(..., description="Banking document to process"),
-    document_type: Optional[str] = Form(
-        default=None,
-        description="Document type (auto-classified if not provided)",
-    ),
-):
+async def _read_upload(file: UploadFile, settings: Settings) -> tuple[bytes, str]:
     """
-    Process a single banking document.
+    Read an upload in chunks, hashing as it streams in.
 
-    1. Validates file type and size
-    2. Classifies document type (if not specified)
-    3. Preprocesses image for optimal OCR
-    4. Extracts structured data using appropriate model
-    5. Runs KYC/AML validation (if applicable)
-    6. Stores results with audit trail
+    Rejects the request with 413 as soon as the size limit is exceeded,
+    before the rest of the body is buffered.
 
-    Returns complete extraction results with confidence scores.
+    Returns:
+        Tuple of (file_bytes, file_hash)
     """
-    start_time = time.time()
-    settings = get_settings()
-    doc_id = DocumentStorage.generate_document_id()
+    hasher = new_file_hasher()
+    chunks = []
+    total_bytes = 0
 
-    try:
-        # ── Step 1: Validate File ────────────────────────────────
-        if not validate_file_extension(file.filename, settings.allowed_extensions_list):
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        total_bytes += len(chunk)
+        if total_bytes > settings.max_file_size_bytes:
             raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type. Allowed: {settings.allowed_extensions_list}",
+                status_code=413,
+                detail=f"File too large. Max: {settings.max_file_size_mb}MB",
             )
+        hasher.update(chunk)
+        chunks.append(chunk)
 
-        file_bytes = await file.read()
-        file_size = get_file_size_mb(file_bytes)
+    return b"".join(chunks), hasher.hexdigest()
+
+
+def _check_extension(filename: str, settings: Settings) -> None:
+    """Reject unsupported file types with 400."""
+    if not validate_file_extension(filename, settings.allowed_extensions_set):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Allowed: {settings.allowed_extensions_list}",
+        )
 
-        if file_size > settings.max_file_size_mb:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large ({file_size:.1f}MB). Max: {settings.max_file_size_mb}MB",
-            )
 
-        file_hash = compute_file_hash(file_bytes)
+async def _run_pipeline(
+    file_bytes: bytes,
+    file_hash: str,
+    filename: str,
+    document_type: Optional[DocumentType],
+    settings: Settings,
+    include_raw_text: bool = False,
+) -> tuple[DocumentProcessResponse, bool]:
+    """
+    Run classification, extraction and validation on an already
+    read and validated upload.
+
+    Does not persist anything; processing errors are returned as a
+    FAILED response rather than raised.
+
+    Returns:
+        Tuple of (response, is_new) — is_new is False for duplicate hits
+        and failures, which callers must not save again.
+    """
+    start_time = time.time()
+    doc_id = DocumentStorage.generate_document_id()
+    ext = filename.rsplit(".", 1)[-1].lower()
+
+    try:
+        file_size = get_file_size_mb(file_bytes)
         logger.info(
-            f"Processing document {doc_id}: {file.filename} "
+            f"Processing document {doc_id}: {filename} "
             f"({file_size:.2f}MB, hash: {file_hash[:12]}...)"
         )
 
+        # ── Duplicate Check: reuse stored result for identical content ──
+        storage = get_storage()
+        cached = await storage.get_result_by_hash(file_hash)
+        if cached and (not document_type or cached["document_type"] == document_type):
+            response = DocumentProcessResponse(**cached)
+            if include_raw_text:
+                # Raw text is stored separately; reprocess if it never was
+                content_gzip = await storage.get_raw_text_gzip(response.document_id)
+                if content_gzip is not None:
+                    response.raw_text = gzip.decompress(content_gzip).decode("utf-8")
+            if not include_raw_text or response.raw_text is not None:
+                logger.info(
+                    f"Duplicate upload {file_hash[:12]}... — returning stored result "
+                    f"{response.document_id}"
+                )
+                return response, False
+
         # ── Step 2: Classify Document ────────────────────────────
         if document_type:
-            doc_type = DocumentType(document_type)
+            doc_type = document_type
             classification_confidence = 1.0
         else:
-            doc_type, classification_confidence, reasoning = await classifier.classify(
-                file_bytes, file.filename
+            doc_type, classification_confidence, reasoning = await get_classifier().classify(
+                file_bytes, filename, file_hash=file_hash
             )
             logger.info(f"Classified as: {doc_type.value} ({classification_confidence:.2f})")
 
         # ── Step 3: Preprocess Image ─────────────────────────────
         processed_bytes = file_bytes
-        content_type = file.content_type or ""
 
-        if "image" in content_type or file.filename.lower().endswith(
-            (".png", ".jpg", ".jpeg", ".tiff", ".bmp")
-        ):
+        if ext in _IMG_EXTS:
+            preprocessor = get_preprocessor()
+            preprocess = None
             if doc_type == DocumentType.CHEQUE:
-                processed_bytes = preprocessor.preprocess_cheque(file_bytes)
+                preprocess = preprocessor.preprocess_cheque
             elif doc_type == DocumentType.ID_CARD:
-                processed_bytes = preprocessor.preprocess_id_card(file_bytes)
+                preprocess = preprocessor.preprocess_id_card
             elif doc_type in (DocumentType.KYC_FORM, DocumentType.TRADE_FINANCE):
-                processed_bytes = preprocessor.preprocess_form(file_bytes)
+                preprocess = preprocessor.preprocess_form
+            if preprocess is not None:
+                # OpenCV releases the GIL: batch documents preprocess in parallel
+                # worker threads instead of blocking the event loop one by one
+                processed_bytes = await asyncio.to_thread(preprocess, file_bytes)
 
         # ── Step 4: Extract Structured Data ──────────────────────
+        extractor = get_extractor()
         extracted_fields, raw_result = await extractor.extract(processed_bytes, doc_type)
+        # Name lookup + OCR text, built once for the processors and the validator
+        field_index = FieldIndex(extracted_fields)
 
         # ── Step 5: Type-Specific Processing ─────────────────────
         extraction_result = None
 
         if doc_type == DocumentType.INVOICE:
-            extraction_result = await invoice_processor.process(extracted_fields, raw_result)
+            extraction_result = await get_invoice_processor().process(
+                extracted_fields, raw_result
+            )
         elif doc_type == DocumentType.CHEQUE:
-            extraction_result = await cheque_processor.process(extracted_fields, raw_result)
+            extraction_result = await get_cheque_processor().process(
+                extracted_fields, raw_result, field_index
+            )
         elif doc_type == DocumentType.KYC_FORM:
-            extraction_result = await kyc_processor.process(extracted_fields, raw_result)
+            extraction_result = await get_kyc_processor().process(
+                extracted_fields, raw_result, field_index
+            )
 
         # ── Step 6: Confidence Check & Validation ────────────────
         confidence_ok, low_fields = extractor.check_confidence(extracted_fields)
 
         validation_result = None
         if doc_type in (DocumentType.KYC_FORM, DocumentType.ID_CARD):
-            validation_result = await validator.validate_kyc(
-                extracted_fields, doc_type.value
+            validation_result = await get_validator().validate_kyc(
+                extracted_fields, doc_type.value, field_index
             )
 
         # ── Step 7: Determine Review Status ──────────────────────
@@ -162,19 +210,16 @@ async def process_document(
             pages_processed=len(raw_result.pages) if raw_result.pages else 1,
             needs_human_review=needs_review,
             review_reason=review_reason,
+            file_hash=file_hash,
+            raw_text=raw_result.content if include_raw_text else None,
         )
 
-        # ── Step 9: Persist Results ──────────────────────────────
-        await storage.save_result(response)
-
         logger.info(
             f"Document {doc_id} processed in {processing_time:.0f}ms "
             f"| Type: {doc_type.value} | Review: {needs_review}"
         )
-        return response
+        return response, True
 
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"Processing failed for {doc_id}: {str(e)}", exc_info=True)
         processing_time = (time.time() - start_time) * 1000
@@ -186,33 +231,117 @@ async def process_document(
             processing_time_ms=round(processing_time, 2),
             needs_human_review=True,
             review_reason=f"Processing error: {str(e)}",
-        )
+        ), False
+
+
+@router.post("/process", response_model=DocumentProcessResponse)
+async def process_document(
+    file: UploadFile = File(..., description="Banking document to process"),
+    document_type: Optional[DocumentType] = Form(
+        default=None,
+        description="Document type (auto-classified if not provided)",
+    ),
+    include_raw_text: bool = Form(
+        default=False,
+        description="Return full OCR text and store it separately (see /{document_id}/raw)",
+    ),
+    settings: Settings = Depends(settings_dep),
+):
+    """
+    Process a single banking document.
+
+    1. Validates file type and size
+    2. Classifies document type (if not specified)
+    3. Preprocesses image for optimal OCR
+    4. Extracts structured data using appropriate model
+    5. Runs KYC/AML validation (if applicable)
+    6. Stores results with audit trail
+
+    Returns complete extraction results with confidence scores.
+    """
+    # ── Step 1: Validate File ────────────────────────────────────
+    _check_extension(file.filename, settings)
+    file_bytes, file_hash = await _read_upload(file, settings)
+
+    response, is_new = await _run_pipeline(
+        file_bytes,
+        file_hash,
+        file.filename,
+        document_type,
+        settings,
+        include_raw_text=include_raw_text,
+    )
+
+    # ── Step 9: Persist Results ──────────────────────────────────
+    if is_new:
+        storage = get_storage()
+        await storage.save_result(response)
+        if response.raw_text:
+            await storage.save_raw_text(response.document_id, response.raw_text)
+
+    return response
 
 
 @router.post("/batch", response_model=BatchProcessResponse)
 async def batch_process(
     files: list[UploadFile] = File(..., description="Multiple banking documents"),
-    document_type: Optional[str] = Form(default=None),
+    document_type: Optional[DocumentType] = Form(default=None),
+    settings: Settings = Depends(settings_dep),
 ):
-    """Process multiple banking documents in a batch."""
+    """Process multiple banking documents in a batch, concurrently."""
     start_time = time.time()
     results = []
     success_count = 0
     failure_count = 0
     review_count = 0
 
+    # Read and validate every upload up front: the underlying
+    # SpooledTemporaryFile is not safe to read from concurrent tasks.
+    accepted = []
     for file in files:
-        # Reuse single document processing for each file
         try:
-            result = await process_document(file=file, document_type=document_type)
-            results.append(result)
-            if result.status == ProcessingStatus.COMPLETED:
-                success_count += 1
-            if result.needs_human_review:
-                review_count += 1
-        except Exception as e:
+            _check_extension(file.filename, settings)
+            file_bytes, file_hash = await _read_upload(file, settings)
+        except HTTPException as e:
             failure_count += 1
-            logger.error(f"Batch item failed: {file.filename} — {str(e)}")
+            logger.error(f"Batch item rejected: {file.filename} — {e.detail}")
+            continue
+        accepted.append((file, file_bytes, file_hash))
+
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+    async def _process_one(
+        file: UploadFile, file_bytes: bytes, file_hash: str
+    ) -> tuple[DocumentProcessResponse, bool]:
+        async with semaphore:
+            return await _run_pipeline(
+                file_bytes,
+                file_hash,
+                file.filename,
+                document_type,
+                settings,
+            )
+
+    outcomes = await asyncio.gather(
+        *(_process_one(*item) for item in accepted), return_exceptions=True
+    )
+
+    new_results = []
+    for (file, _, _), outcome in zip(accepted, outcomes):
+        if isinstance(outcome, Exception):
+            failure_count += 1
+            logger.error(f"Batch item failed: {file.filename} — {str(outcome)}")
+            continue
+        response, is_new = outcome
+        results.append(response)
+        if is_new:
+            new_results.append(response)
+        if response.status == ProcessingStatus.COMPLETED:
+            success_count += 1
+        if response.needs_human_review:
+            review_count += 1
+
+    await get_storage().save_results_bulk(new_results)
 
     total_time = (time.time() - start_time) * 1000
     return BatchProcessResponse(
@@ -229,16 +358,32 @@ async def batch_process(
 @router.get("/{document_id}", response_model=dict)
 async def get_document(document_id: str):
     """Retrieve processed document results by ID."""
-    result = await storage.get_result(document_id)
+    result = await get_storage().get_result(document_id)
     if not result:
         raise HTTPException(status_code=404, detail="Document not found")
     return result
 
 
+@router.get("/{document_id}/raw")
+async def get_document_raw_text(document_id: str):
+    """
+    Retrieve the full OCR text stored for a document processed with
+    include_raw_text. Served gzip-encoded as stored; HTTP clients decompress.
+    """
+    content_gzip = await get_storage().get_raw_text_gzip(document_id)
+    if content_gzip is None:
+        raise HTTPException(status_code=404, detail="Raw text not found")
+    return Response(
+        content=content_gzip,
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Encoding": "gzip"},
+    )
+
+
 @router.get("/{document_id}/validate", response_model=ValidationResult)
 async def validate_document(document_id: str):
     """Run KYC/AML validation on a previously processed document."""
-    result = await storage.get_result(document_id)
+    result = await get_storage().get_result(document_id)
     if not result:
         raise HTTPException(status_code=404, detail="Document not found")
 
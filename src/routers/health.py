@@ -1,26 +1,53 @@
 """Health check endpoints for monitoring and readiness probes."""
 
-from datetime import datetime
+from datetime import datetime, timezone
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ..deps import get_status_cache
 from ..models.schemas import HealthResponse
 
 router = APIRouter(tags=["Health"])
 
+# Probe payloads are static apart from the timestamp and cached statuses —
+# validate once at import and return a pre-serialized dict, bypassing
+# per-request model construction.
+_HEALTH_TEMPLATE = HealthResponse(
+    status="healthy",
+    version="1.0.0",
+    document_intelligence_status="unknown",
+    openai_status="unknown",
+    database_status="unknown",
+    timestamp=datetime.now(timezone.utc),
+).model_dump(mode="json")
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Service health check — used by load balancers and Kubernetes probes."""
-    return HealthResponse(
-        status="healthy",
-        version="1.0.0",
-        document_intelligence_status="configured",
-        openai_status="configured",
-        database_status="configured",
-        timestamp=datetime.utcnow(),
+    """
+    Service health check — used by load balancers and Kubernetes probes.
+
+    Dependency statuses come from the background-refreshed StatusCache;
+    no network I/O happens on the probe path.
+    """
+    cache = get_status_cache()
+    statuses = cache.statuses
+    return JSONResponse(
+        {
+            **_HEALTH_TEMPLATE,
+            "status": "healthy" if cache.ready else "degraded",
+            "document_intelligence_status": statuses["doc_intel"].status,
+            "openai_status": statuses["openai"].status,
+            "database_status": statuses["db"].status,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
     )
 
 
 @router.get("/ready")
 async def readiness_check():
-    """Readiness probe — checks if all dependencies are reachable."""
-    return {"ready": True, "timestamp": datetime.utcnow().isoformat()}
+    """Readiness probe — 503 until the Azure AI services have last been seen reachable."""
+    ready = get_status_cache().ready
+    return JSONResponse(
+        {"ready": ready, "timestamp": datetime.now(timezone.utc).isoformat()},
+        status_code=200 if ready else 503,
+    )
@@ -5,17 +5,34 @@ Supports local file fallback when Azure is not configured.
 """
 
 import os
-import json
-import uuid
+import gzip
+import asyncio
 import logging
-from datetime import datetime
+import secrets
+from pathlib import Path
+from time import gmtime, strftime
+
+import orjson
+from pydantic import TypeAdapter
+
+from ..models.schemas import DocumentProcessResponse
 
 logger = logging.getLogger(__name__)
 
+BATCH_RESULTS_ADAPTER = TypeAdapter(list[DocumentProcessResponse])
+JSON_GZIP_LEVEL = 3  # JSON compresses 5–10× even at low levels; keep it cheap
+
 # Azure SDK import — graceful fallback if not installed
 try:
+    from azure.core.exceptions import ResourceNotFoundError
     from azure.storage.blob import BlobServiceClient, ContentSettings
     AZURE_BLOB_AVAILABLE = True
+    JSON_CONTENT_SETTINGS = ContentSettings(
+        content_type="application/json", content_encoding="gzip"
+    )
+    RAW_TEXT_CONTENT_SETTINGS = ContentSettings(
+        content_type="text/plain; charset=utf-8", content_encoding="gzip"
+    )
 except ImportError:
     AZURE_BLOB_AVAILABLE = False
     logger.warning("azure-storage-blob not installed. Using local storage fallback.")
@@ -33,11 +50,19 @@ class BlobStorageConnector:
         self.container_results = os.getenv("BLOB_CONTAINER_RESULTS", "banking-doc-results")
         self.use_azure = bool(self.connection_string) and AZURE_BLOB_AVAILABLE
         self.blob_service = None
+        self.uploads_container = None
+        self.results_container = None
 
         if self.use_azure:
             try:
                 self.blob_service = BlobServiceClient.from_connection_string(self.connection_string)
                 self._ensure_containers()
+                self.uploads_container = self.blob_service.get_container_client(
+                    self.container_uploads
+                )
+                self.results_container = self.blob_service.get_container_client(
+                    self.container_results
+                )
                 logger.info("Azure Blob Storage connected")
             except Exception as e:
                 logger.warning(f"Azure Blob init failed: {e}. Using local storage.")
@@ -66,23 +91,21 @@ class BlobStorageConnector:
         Returns:
             dict with storage_path, storage_type, upload_id
         """
-        upload_id = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}_{filename}"
+        upload_id = f"{strftime('%Y%m%d_%H%M%S', gmtime())}_{secrets.token_hex(4)}_{filename}"
 
         if self.use_azure:
-            blob_client = self.blob_service.get_blob_client(
-                container=self.container_uploads, blob=upload_id
-            )
-            blob_client.upload_blob(
-                file_bytes,
+            blob_client = await asyncio.to_thread(
+                self.uploads_container.upload_blob,
+                name=upload_id,
+                data=file_bytes,
                 overwrite=True,
                 content_settings=ContentSettings(content_type=content_type),
             )
-            storage_path = f"https://{self.blob_service.account_name}.blob.core.windows.net/{self.container_uploads}/{upload_id}"
+            storage_path = blob_client.url
             logger.info(f"Uploaded to Azure Blob: {upload_id}")
         else:
             local_path = os.path.join("uploads", upload_id)
-            with open(local_path, "wb") as f:
-                f.write(file_bytes)
+            await asyncio.to_thread(Path(local_path).write_bytes, file_bytes)
             storage_path = local_path
             logger.info(f"Saved locally: {local_path}")
 
@@ -94,47 +117,137 @@ class BlobStorageConnector:
             "size_bytes": len(file_bytes),
         }
 
-    async def save_result(self, document_id: str, result: dict) -> str:
-        """Save processing result as JSON."""
-        result_filename = f"{document_id}_result.json"
-        result_json = json.dumps(result, indent=2, default=str)
+    async def save_result(self, result: DocumentProcessResponse) -> str:
+        """
+        Save processing result as gzip-encoded JSON.
 
-        if self.use_azure:
-            blob_client = self.blob_service.get_blob_client(
-                container=self.container_results, blob=result_filename
-            )
-            blob_client.upload_blob(
-                result_json,
-                overwrite=True,
-                content_settings=ContentSettings(content_type="application/json"),
+        When the result carries a file_hash, a small hash_{file_hash}.json
+        pointer is written alongside it so duplicate uploads can be resolved
+        with a single lookup (see get_result_by_hash).
+        """
+        document_id = result.document_id
+        result_json = result.model_dump_json(exclude_none=True, exclude={"raw_text"}).encode()
+        path = await self._put_json(f"{document_id}_result.json", result_json)
+
+        if result.file_hash:
+            await self._put_json(
+                f"hash_{result.file_hash}.json", orjson.dumps({"document_id": document_id})
             )
-            path = f"https://{self.blob_service.account_name}.blob.core.windows.net/{self.container_results}/{result_filename}"
-        else:
-            path = os.path.join("outputs", result_filename)
-            with open(path, "w") as f:
-                f.write(result_json)
 
         return path
 
+    async def save_batch_results(
+        self, batch_id: str, results: list[DocumentProcessResponse]
+    ) -> str:
+        """Save all results of a batch as a single JSON array document."""
+        payload = BATCH_RESULTS_ADAPTER.dump_json(
+            results, exclude_none=True, exclude={"__all__": {"raw_text"}}
+        )
+        return await self._put_json(f"{batch_id}_results.json", payload)
+
+    async def save_raw_text(self, document_id: str, raw_text: str) -> str:
+        """Save full OCR text as a separate gzip-encoded {document_id}_raw.txt.gz blob."""
+        content_gzip = gzip.compress(raw_text.encode("utf-8"), compresslevel=6)
+        return await self._put_result(
+            f"{document_id}_raw.txt.gz",
+            content_gzip,
+            content_settings=RAW_TEXT_CONTENT_SETTINGS if self.use_azure else None,
+        )
+
+    async def get_raw_text_gzip(self, document_id: str) -> bytes | None:
+        """Retrieve OCR text still gzip-compressed, for passthrough to clients."""
+        try:
+            return await self._fetch_result(f"{document_id}_raw.txt.gz", decompress=False)
+        except Exception as e:
+            logger.error(f"Failed to retrieve raw text {document_id}: {e}")
+            return None
+
     async def get_result(self, document_id: str) -> dict | None:
         """Retrieve a processing result."""
-        result_filename = f"{document_id}_result.json"
+        try:
+            data = await self._fetch_json(f"{document_id}_result.json")
+            return orjson.loads(data) if data is not None else None
+        except Exception as e:
+            logger.error(f"Failed to retrieve result {document_id}: {e}")
+            return None
 
+    async def get_result_by_hash(self, file_hash: str) -> dict | None:
+        """Retrieve the stored result for previously processed file content."""
         try:
-            if self.use_azure:
-                blob_client = self.blob_service.get_blob_client(
-                    container=self.container_results, blob=result_filename
-                )
-                data = blob_client.download_blob().readall()
-                return json.loads(data)
-            else:
-                path = os.path.join("outputs", result_filename)
-                if os.path.exists(path):
-                    with open(path, "r") as f:
-                        return json.load(f)
+            pointer = await self._fetch_json(f"hash_{file_hash}.json")
+            if pointer is None:
                 return None
+            return await self.get_result(orjson.loads(pointer)["document_id"])
         except Exception as e:
-            logger.error(f"Failed to retrieve result {document_id}: {e}")
+            logger.error(f"Failed to resolve hash pointer {file_hash[:12]}...: {e}")
+            return None
+
+    async def _put_json(self, result_filename: str, data: bytes) -> str:
+        """
+        Gzip-compress a JSON document and write it to the results container.
+
+        Blobs keep their .json name with Content-Encoding: gzip; the local
+        fallback writes {result_filename}.gz instead.
+        """
+        payload = gzip.compress(data, compresslevel=JSON_GZIP_LEVEL)
+        if self.use_azure:
+            return await self._put_result(
+                result_filename, payload, content_settings=JSON_CONTENT_SETTINGS
+            )
+        return await self._put_result(f"{result_filename}.gz", payload)
+
+    async def _fetch_json(self, result_filename: str) -> bytes | None:
+        """Read a JSON document written by _put_json, decompressed; None if missing."""
+        if self.use_azure:
+            # The SDK decodes Content-Encoding: gzip on download
+            return await self._fetch_result(result_filename)
+
+        data = await self._fetch_result(f"{result_filename}.gz")
+        if data is not None:
+            return gzip.decompress(data)
+        # Results written before compression was enabled
+        return await self._fetch_result(result_filename)
+
+    async def _put_result(
+        self, result_filename: str, data: bytes, content_settings=None
+    ) -> str:
+        """Write a document to the results container (or outputs/) as-is."""
+        if self.use_azure:
+            blob_client = await asyncio.to_thread(
+                self.results_container.upload_blob,
+                name=result_filename,
+                data=data,
+                overwrite=True,
+                content_settings=content_settings,
+            )
+            return blob_client.url
+
+        path = os.path.join("outputs", result_filename)
+        await asyncio.to_thread(Path(path).write_bytes, data)
+        return path
+
+    async def _fetch_result(
+        self, result_filename: str, decompress: bool = True
+    ) -> bytes | None:
+        """Read a document from the results container (or outputs/); None if missing."""
+        if self.use_azure:
+            return await asyncio.to_thread(
+                self._download_result, result_filename, decompress
+            )
+
+        path = Path("outputs", result_filename)
+        if not path.exists():
+            return None
+        return await asyncio.to_thread(path.read_bytes)
+
+    def _download_result(
+        self, result_filename: str, decompress: bool = True
+    ) -> bytes | None:
+        """Blocking download of a result blob — run via asyncio.to_thread."""
+        blob_client = self.results_container.get_blob_client(result_filename)
+        try:
+            return blob_client.download_blob(decompress=decompress).readall()
+        except ResourceNotFoundError:
             return None
 
     def get_storage_info(self) -> dict:
@@ -4,14 +4,136 @@ Specialized extraction for banking cheques including MICR code parsing,
 amount validation, and signature detection.
 """
 
+import asyncio
 import re
 import logging
+
+import numpy as np
+
+from ..models.field_index import FieldIndex
 from ..models.schemas import ChequeResult, ExtractedField
 
 logger = logging.getLogger(__name__)
 
+# RE2 (google-re2) runs these patterns in linear time with no backtracking,
+# so adversarial OCR text can't blow up a scan. Falls back to stdlib re.
+# Note: under RE2, \d and \s match ASCII only.
+try:
+    import re2 as _regex_engine
+    RE2_AVAILABLE = True
+except ImportError:
+    _regex_engine = re
+    RE2_AVAILABLE = False
+
+
+def _compile(pattern: str, ignore_case: bool = False):
+    """Compile with the active engine; inline (?i) works on both."""
+    return _regex_engine.compile(f"(?i){pattern}" if ignore_case else pattern)
+
+
 # MICR code pattern: [cheque_number] [bank_routing_code] [account_number]
-MICR_PATTERN = r"[\u2446]?(\d{6})[\u2446]?\s*[\u2447]?(\d{9})[\u2447]?\s*(\d{6,12})"
+# E-13B transit (U+2446) and on-us (U+2447) symbols are written as literal
+# characters: RE2 has no \uXXXX escape.
+MICR_PATTERN = r"[⑆]?(\d{6})[⑆]?\s*[⑇]?(\d{9})[⑇]?\s*(\d{6,12})"
+
+# Patterns are compiled once at import and reused for every cheque.
+# MICR_PATTERN also covers the plain "digits space digits space digits"
+# layout (its separators are optional), so no separate numeric fallback.
+_MICR_RE = _compile(MICR_PATTERN)
+
+# Common amount patterns: AED 50,000.00 or Rs. 1,00,000.00 or $5,000
+_AMOUNT_RES = [
+    _compile(p, ignore_case=True)
+    for p in (
+        r"(?:AED|USD|INR|Rs\.?|SAR|\$|£|€)\s*([\d,]+\.?\d*)",
+        r"([\d,]+\.?\d*)\s*(?:AED|USD|INR|SAR|/-)",
+        r"\*{1,3}\s*([\d,]+\.?\d*)\s*\*{1,3}",  # Amount between asterisks
+    )
+]
+
+# Amount in words: "Fifty Thousand Only" or "Rupees ... Only"
+_AMOUNT_WORDS_RE = _compile(
+    r"(?:Rupees?|Dirhams?|Dollars?|Pay)[\s:]+(.+?)(?:Only|ONLY|only)", ignore_case=True
+)
+
+# Common date patterns: DD/MM/YYYY, DD-MM-YYYY, DD MMM YYYY
+_DATE_RES = [
+    _compile(p, ignore_case=True)
+    for p in (
+        r"(?:Date|Dated?)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
+        r"(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{4})",
+        r"(\d{1,2}[/-]\d{1,2}[/-]\d{4})",
+    )
+]
+
+_PAYEE_RE = _compile(
+    r"(?:Pay|Pay to|Payee)[\s:]+(.+?)(?:\n|or bearer|or order)", ignore_case=True
+)
+
+
+_SCAN_PATTERNS = [_MICR_RE, *_AMOUNT_RES, _AMOUNT_WORDS_RE, *_DATE_RES, _PAYEE_RE]
+
+
+def _build_prefilter():
+    """
+    Compile every cheque pattern into one RE2::Set.
+
+    The set runs a single DFA over the text and reports exactly which
+    patterns match, but yields no capture groups — the per-field regex
+    searches then run only for patterns that are known to hit.
+
+    Returns a function mapping text to matching pattern ids (indexes into
+    _SCAN_PATTERNS), or None without RE2.
+    """
+    if not RE2_AVAILABLE:
+        return None
+
+    pattern_set = _regex_engine.Set.SearchSet(_regex_engine.Options())
+    for pattern in _SCAN_PATTERNS:
+        pattern_set.Add(pattern.pattern)
+    pattern_set.Compile()
+    return lambda text: pattern_set.Match(text) or ()  # Match() gives None on no hit
+
+
+_PREFILTER = _build_prefilter()
+
+
+# Without RE2: cheap necessary conditions that rule a pattern out before
+# its full search runs (MICR needs a 6-digit run; amount in words needs "only")
+_DIGIT_RUN6 = re.compile(r"\d{6}")
+_LITERAL_GATES = {
+    _MICR_RE: lambda text: _DIGIT_RUN6.search(text) is not None,
+    _AMOUNT_WORDS_RE: lambda text: "only" in text.lower(),
+}
+
+
+def _candidate_patterns(text: str) -> set:
+    """Patterns that may match text (exact under RE2, a superset otherwise)."""
+    if _PREFILTER is not None:
+        return {_SCAN_PATTERNS[i] for i in _PREFILTER(text)}
+    return {
+        pattern
+        for pattern in _SCAN_PATTERNS
+        if pattern not in _LITERAL_GATES or _LITERAL_GATES[pattern](text)
+    }
+
+
+def _search(pattern: re.Pattern, text: str, candidates: set | None = None) -> re.Match | None:
+    """pattern.search(text), skipped when the prefilter ruled the pattern out."""
+    if candidates is not None and pattern not in candidates:
+        return None
+    return pattern.search(text)
+
+
+def _first_match(
+    patterns: list[re.Pattern], text: str, candidates: set | None = None
+) -> re.Match | None:
+    """Search with each pattern in priority order; the first hit wins."""
+    for pattern in patterns:
+        match = _search(pattern, text, candidates)
+        if match:
+            return match
+    return None
 
 
 class ChequeProcessor:
@@ -34,7 +156,10 @@ class ChequeProcessor:
     }
 
     async def process(
-        self, extracted_fields: list[ExtractedField], raw_result
+        self,
+        extracted_fields: list[ExtractedField],
+        raw_result,
+        index: FieldIndex | None = None,
     ) -> ChequeResult:
         """
         Process extracted cheque data into structured ChequeResult.
@@ -42,17 +167,26 @@ class ChequeProcessor:
         Args:
             extracted_fields: Fields from Document Intelligence extraction
             raw_result: Raw AnalyzeResult for additional processing
+            index: FieldIndex of extracted_fields, if the caller already built one
 
         Returns:
             Structured ChequeResult with all cheque fields
         """
+        # Regex scans and signature analysis are CPU-bound: keep it off the event loop
+        return await asyncio.to_thread(
+            self._process_sync, index or FieldIndex(extracted_fields), raw_result
+        )
+
+    def _process_sync(self, index: FieldIndex, raw_result) -> ChequeResult:
+        """Synchronous body of process(); runs in a worker thread."""
         result = ChequeResult()
 
-        # Build a text map from extracted fields
-        text_content = self._build_text_content(extracted_fields)
+        # All OCR text lines as one searchable string
+        text_content = index.text
+        candidates = _candidate_patterns(text_content)
 
         # Extract MICR code
-        micr_data = self._extract_micr(text_content)
+        micr_data = self._extract_micr(text_content, candidates)
         if micr_data:
             result.cheque_number = ExtractedField(
                 field_name="cheque_number",
@@ -78,18 +212,18 @@ class ChequeProcessor:
             )
 
         # Extract amount (figures and words)
-        result.amount_in_figures = self._extract_amount_figures(text_content)
-        result.amount_in_words = self._extract_amount_words(text_content)
+        result.amount_in_figures = self._extract_amount_figures(text_content, candidates)
+        result.amount_in_words = self._extract_amount_words(text_content, candidates)
 
         # Cross-validate amounts
         if result.amount_in_figures and result.amount_in_words:
             self._validate_amounts(result)
 
         # Extract date
-        result.cheque_date = self._extract_date(text_content)
+        result.cheque_date = self._extract_date(text_content, candidates)
 
         # Extract payee
-        result.payee_name = self._extract_payee(text_content)
+        result.payee_name = self._extract_payee(text_content, candidates)
 
         # Check for signature presence
         result.signature_detected = self._detect_signature_region(raw_result)
@@ -99,27 +233,9 @@ class ChequeProcessor:
         )
         return result
 
-    def _build_text_content(self, fields: list[ExtractedField]) -> str:
-        """Concatenate all text fields into searchable content."""
-        return "\n".join(
-            f.value for f in fields if f.value and f.field_name == "text_line"
-        )
-
-    def _extract_micr(self, text: str) -> dict | None:
+    def _extract_micr(self, text: str, candidates: set | None = None) -> dict | None:
         """Extract and parse MICR code from cheque text."""
-        # Try standard MICR pattern
-        match = re.search(MICR_PATTERN, text)
-        if match:
-            return {
-                "cheque_number": match.group(1),
-                "routing_code": match.group(2),
-                "account_number": match.group(3),
-                "full_micr": f"{match.group(1)} {match.group(2)} {match.group(3)}",
-            }
-
-        # Try alternative numeric patterns (6+ consecutive digits near bottom)
-        alt_pattern = r"(\d{6})\s+(\d{9})\s+(\d{6,12})"
-        match = re.search(alt_pattern, text)
+        match = _search(_MICR_RE, text, candidates)
         if match:
             return {
                 "cheque_number": match.group(1),
@@ -127,33 +243,26 @@ class ChequeProcessor:
                 "account_number": match.group(3),
                 "full_micr": f"{match.group(1)} {match.group(2)} {match.group(3)}",
             }
-
         return None
 
-    def _extract_amount_figures(self, text: str) -> ExtractedField | None:
+    def _extract_amount_figures(
+        self, text: str, candidates: set | None = None
+    ) -> ExtractedField | None:
         """Extract numerical amount from cheque."""
-        # Match common amount patterns: AED 50,000.00 or Rs. 1,00,000.00 or $5,000
-        patterns = [
-            r"(?:AED|USD|INR|Rs\.?|SAR|\$|£|€)\s*([\d,]+\.?\d*)",
-            r"([\d,]+\.?\d*)\s*(?:AED|USD|INR|SAR|/-)",
-            r"\*{1,3}\s*([\d,]+\.?\d*)\s*\*{1,3}",  # Amount between asterisks
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                amount = match.group(1).replace(",", "")
-                return ExtractedField(
-                    field_name="amount_in_figures",
-                    value=amount,
-                    confidence=0.85,
-                )
+        match = _first_match(_AMOUNT_RES, text, candidates)
+        if match:
+            return ExtractedField(
+                field_name="amount_in_figures",
+                value=match.group(1).replace(",", ""),
+                confidence=0.85,
+            )
         return None
 
-    def _extract_amount_words(self, text: str) -> ExtractedField | None:
+    def _extract_amount_words(
+        self, text: str, candidates: set | None = None
+    ) -> ExtractedField | None:
         """Extract amount in words from cheque."""
-        # Look for patterns like "Fifty Thousand Only" or "Rupees ... Only"
-        pattern = r"(?:Rupees?|Dirhams?|Dollars?|Pay)[\s:]+(.+?)(?:Only|ONLY|only)"
-        match = re.search(pattern, text, re.IGNORECASE)
+        match = _search(_AMOUNT_WORDS_RE, text, candidates)
         if match:
             return ExtractedField(
                 field_name="amount_in_words",
@@ -172,28 +281,20 @@ class ChequeProcessor:
                 f"words={result.amount_in_words.value}"
             )
 
-    def _extract_date(self, text: str) -> ExtractedField | None:
+    def _extract_date(self, text: str, candidates: set | None = None) -> ExtractedField | None:
         """Extract cheque date."""
-        # Common date patterns: DD/MM/YYYY, DD-MM-YYYY, DD MMM YYYY
-        patterns = [
-            r"(?:Date|Dated?)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
-            r"(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\w*\s+\d{4})",
-            r"(\d{1,2}[/-]\d{1,2}[/-]\d{4})",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return ExtractedField(
-                    field_name="cheque_date",
-                    value=match.group(1),
-                    confidence=0.85,
-                )
+        match = _first_match(_DATE_RES, text, candidates)
+        if match:
+            return ExtractedField(
+                field_name="cheque_date",
+                value=match.group(1),
+                confidence=0.85,
+            )
         return None
 
-    def _extract_payee(self, text: str) -> ExtractedField | None:
+    def _extract_payee(self, text: str, candidates: set | None = None) -> ExtractedField | None:
         """Extract payee name from cheque."""
-        pattern = r"(?:Pay|Pay to|Payee)[\s:]+(.+?)(?:\n|or bearer|or order)"
-        match = re.search(pattern, text, re.IGNORECASE)
+        match = _search(_PAYEE_RE, text, candidates)
         if match:
             return ExtractedField(
                 field_name="payee_name",
@@ -209,20 +310,41 @@ class ChequeProcessor:
         """
         # In production: analyze bottom-right quadrant for ink marks
         # using the bounding regions from the layout analysis
-        if raw_result and hasattr(raw_result, "pages") and raw_result.pages:
-            page = raw_result.pages[0]
-            # Check if there are marks in the signature region (bottom-right)
-            if page.lines:
-                page_height = page.height or 1000
-                page_width = page.width or 1000
-                for line in page.lines:
-                    if hasattr(line, "polygon") and line.polygon:
-                        # Check if text is in bottom-right quadrant
-                        y_positions = [line.polygon[i] for i in range(1, len(line.polygon), 2)]
-                        x_positions = [line.polygon[i] for i in range(0, len(line.polygon), 2)]
-                        if (
-                            any(y > page_height * 0.75 for y in y_positions)
-                            and any(x > page_width * 0.5 for x in x_positions)
-                        ):
-                            return True
-        return False
+        if not (raw_result and hasattr(raw_result, "pages") and raw_result.pages):
+            return False
+
+        page = raw_result.pages[0]
+        if not page.lines:
+            return False
+
+        # Signature region is the bottom-right quadrant
+        y_limit = (page.height or 1000) * 0.75
+        x_limit = (page.width or 1000) * 0.5
+        polygons = [
+            line.polygon for line in page.lines if hasattr(line, "polygon") and line.polygon
+        ]
+        if not polygons:
+            return False
+
+        try:
+            # One (lines, coords) array: [x0, y0, x1, y1, ...] per row
+            coords = np.asarray(polygons, dtype=np.float64)
+        except ValueError:
+            coords = None
+
+        if coords is None or coords.ndim != 2:
+            # Ragged polygons (varying vertex counts): check line by line,
+            # comparing each axis's max against the hoisted limits
+            for polygon in polygons:
+                if (
+                    max(polygon[1::2], default=0) > y_limit
+                    and max(polygon[0::2], default=0) > x_limit
+                ):
+                    return True
+            return False
+        if coords.shape[1] < 2:
+            return False
+
+        max_x = coords[:, 0::2].max(axis=1)
+        max_y = coords[:, 1::2].max(axis=1)
+        return bool(((max_y > y_limit) & (max_x > x_limit)).any())
@@ -4,12 +4,19 @@ Classifies incoming banking documents into predefined categories
 using multimodal capabilities (image + text understanding).
 """
 
+import asyncio
 import base64
 import logging
-from pathlib import Path
-from openai import AzureOpenAI
+from io import BytesIO
+
+import orjson
+from cachetools import LRUCache
+from PIL import Image
+
 from ..config import get_settings
 from ..models.enums import DocumentType
+from ..utils.helpers import compute_file_hash
+from .openai_client import get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -33,56 +40,114 @@ Respond with ONLY a JSON object in this exact format:
 }
 """
 
+# Classification only needs the page layout: images are shrunk to this
+# long edge and re-encoded as JPEG before being sent to GPT-4o
+CLASSIFY_MAX_EDGE_PX = 2048
+CLASSIFY_JPEG_QUALITY = 85
+# PNG/JPEG uploads under this size are sent unchanged
+DOWNSCALE_MIN_BYTES = 512 * 1024
+
+# Classifications remembered per content hash (retries, repeated uploads)
+CLASSIFICATION_CACHE_SIZE = 1024
+
+# File extension → media type for the GPT-4o image payload
+_EXT2MIME = {
+    "pdf": "application/pdf",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "tiff": "image/tiff",
+    "bmp": "image/bmp",
+}
+
 
 class DocumentClassifier:
     """Classifies banking documents using GPT-4o vision capabilities."""
 
     def __init__(self):
         settings = get_settings()
-        self.client = AzureOpenAI(
-            azure_endpoint=settings.azure_openai_endpoint,
-            api_key=settings.azure_openai_api_key,
-            api_version=settings.azure_openai_api_version,
-        )
+        self.client = get_openai_client()
         self.deployment = settings.azure_openai_deployment_name
+        self.max_parallel = settings.batch_concurrency
+        self._cache: LRUCache[str, tuple[DocumentType, float, str]] = LRUCache(
+            maxsize=CLASSIFICATION_CACHE_SIZE
+        )
 
     def _encode_image(self, file_bytes: bytes, content_type: str) -> str:
         """Encode image bytes to base64 for GPT-4o vision."""
         return base64.b64encode(file_bytes).decode("utf-8")
 
+    def _maybe_downscale(self, file_bytes: bytes, media_type: str) -> tuple[bytes, str]:
+        """
+        Shrink an image to CLASSIFY_MAX_EDGE_PX and re-encode as JPEG.
+
+        PDFs pass through. Small PNG/JPEG files skip the pass; TIFF/BMP are
+        always converted. Falls back to the original bytes if decoding fails
+        or the result would not be smaller.
+
+        Returns:
+            Tuple of (image_bytes, media_type)
+        """
+        if not media_type.startswith("image/"):
+            return file_bytes, media_type
+        if media_type in ("image/png", "image/jpeg") and len(file_bytes) < DOWNSCALE_MIN_BYTES:
+            return file_bytes, media_type
+
+        try:
+            with Image.open(BytesIO(file_bytes)) as img:
+                img.thumbnail((CLASSIFY_MAX_EDGE_PX, CLASSIFY_MAX_EDGE_PX))
+                if img.mode not in ("RGB", "L"):
+                    img = img.convert("RGB")
+                buffer = BytesIO()
+                img.save(buffer, "JPEG", quality=CLASSIFY_JPEG_QUALITY, optimize=True)
+        except Exception as e:
+            logger.warning(f"Downscale skipped, sending original image: {e}")
+            return file_bytes, media_type
+
+        if buffer.tell() >= len(file_bytes):
+            return file_bytes, media_type
+        return buffer.getvalue(), "image/jpeg"
+
     def _get_media_type(self, filename: str) -> str:
         """Determine media type from file extension."""
-        ext = Path(filename).suffix.lower()
-        media_types = {
-            ".pdf": "application/pdf",
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".tiff": "image/tiff",
-            ".bmp": "image/bmp",
-        }
-        return media_types.get(ext, "application/octet-stream")
+        dot = filename.rfind(".")
+        if dot == -1:
+            return "application/octet-stream"
+        return _EXT2MIME.get(filename[dot + 1:].lower(), "application/octet-stream")
 
     async def classify(
-        self, file_bytes: bytes, filename: str
+        self, file_bytes: bytes, filename: str, file_hash: str | None = None
     ) -> tuple[DocumentType, float, str]:
         """
         Classify a banking document using GPT-4o multimodal vision.
 
+        Successful classifications are cached by content hash, so identical
+        bytes are only sent to GPT-4o once.
+
         Args:
             file_bytes: Raw file bytes
             filename: Original filename for media type detection
+            file_hash: compute_file_hash(file_bytes), if the caller has it
 
         Returns:
             Tuple of (DocumentType, confidence_score, reasoning)
         """
+        cache_key = file_hash or compute_file_hash(file_bytes)
+        cached = self._cache.get(cache_key)
+        if cached:
+            logger.info(f"Classification cache hit: {filename} ({cache_key[:12]}...)")
+            return cached
+
         try:
             media_type = self._get_media_type(filename)
-            base64_image = self._encode_image(file_bytes, media_type)
+            image_bytes, media_type = await asyncio.to_thread(
+                self._maybe_downscale, file_bytes, media_type
+            )
+            base64_image = self._encode_image(image_bytes, media_type)
 
             logger.info(f"Classifying document: {filename} ({media_type})")
 
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.deployment,
                 messages=[
                     {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
@@ -108,8 +173,7 @@ class DocumentClassifier:
                 response_format={"type": "json_object"},
             )
 
-            import json
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
 
             doc_type = DocumentType(result.get("document_type", "unknown"))
             confidence = float(result.get("confidence", 0.0))
@@ -120,6 +184,7 @@ class DocumentClassifier:
                 f"(confidence: {confidence:.2f}) — {reasoning}"
             )
 
+            self._cache[cache_key] = (doc_type, confidence, reasoning)
             return doc_type, confidence, reasoning
 
         except Exception as e:
@@ -130,16 +195,20 @@ class DocumentClassifier:
         self, files: list[tuple[bytes, str]]
     ) -> list[tuple[DocumentType, float, str]]:
         """
-        Classify multiple documents.
+        Classify multiple documents, up to max_parallel at a time.
 
         Args:
             files: List of (file_bytes, filename) tuples
 
         Returns:
-            List of classification results
+            List of classification results, in input order
         """
-        results = []
-        for file_bytes, filename in files:
-            result = await self.classify(file_bytes, filename)
-            results.append(result)
-        return results
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        async def _classify_one(file_bytes: bytes, filename: str):
+            async with semaphore:
+                return await self.classify(file_bytes, filename)
+
+        return await asyncio.gather(
+            *(_classify_one(file_bytes, filename) for file_bytes, filename in files)
+        )
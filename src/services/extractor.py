@@ -3,6 +3,7 @@ Core document extraction service using Azure AI Document Intelligence.
 Handles routing to prebuilt and custom models based on document type.
 """
 
+import asyncio
 import logging
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.ai.documentintelligence.models import (
@@ -14,7 +15,7 @@ from azure.core.credentials import AzureKeyCredential
 
 from ..config import get_settings
 from ..models.enums import DocumentType
-from ..models.schemas import ExtractedField
+from ..models.schemas import EXTRACTED_FIELDS_ADAPTER, ExtractedField
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,15 @@ MODEL_MAPPING = {
 }
 
 
+# Field type → (value_* attribute, formatter to a display string)
+_TYPED_VALUE_FORMATTERS = {
+    "string": ("value_string", lambda v: v),
+    "number": ("value_number", str),
+    "date": ("value_date", lambda v: v.isoformat()),
+    "currency": ("value_currency", lambda v: f"{v.symbol or ''}{v.amount}"),
+}
+
+
 class DocumentExtractor:
     """
     Extracts structured data from banking documents using
@@ -49,16 +59,16 @@ class DocumentExtractor:
         self, field_name: str, field: DocumentField, page_number: int = 1
     ) -> ExtractedField:
         """Convert Azure DocumentField to our ExtractedField schema."""
+        # The SDK populates only the value_* attribute matching field.type;
+        # empty or untyped values fall back to the raw content
         value = None
-        if field.value_string:
-            value = field.value_string
-        elif field.value_number:
-            value = str(field.value_number)
-        elif field.value_date:
-            value = field.value_date.isoformat()
-        elif field.value_currency:
-            value = f"{field.value_currency.symbol or ''}{field.value_currency.amount}"
-        elif field.content:
+        typed = _TYPED_VALUE_FORMATTERS.get(field.type)
+        if typed is not None:
+            attr, fmt = typed
+            raw = getattr(field, attr, None)
+            if raw:
+                value = fmt(raw)
+        if value is None and field.content:
             value = field.content
 
         bounding_box = None
@@ -74,6 +84,15 @@ class DocumentExtractor:
             page_number=page_number,
         )
 
+    def _analyze(self, model_id: str, file_bytes: bytes) -> AnalyzeResult:
+        """Submit a document and block until Azure finishes analysing it."""
+        poller = self.client.begin_analyze_document(
+            model_id=model_id,
+            analyze_request=AnalyzeDocumentRequest(bytes_source=file_bytes),
+            content_type="application/octet-stream",
+        )
+        return poller.result()
+
     async def extract(
         self, file_bytes: bytes, document_type: DocumentType
     ) -> tuple[list[ExtractedField], AnalyzeResult]:
@@ -91,12 +110,9 @@ class DocumentExtractor:
         logger.info(f"Extracting with model: {model_id} for type: {document_type.value}")
 
         try:
-            poller = self.client.begin_analyze_document(
-                model_id=model_id,
-                analyze_request=AnalyzeDocumentRequest(bytes_source=file_bytes),
-                content_type="application/octet-stream",
-            )
-            result: AnalyzeResult = poller.result()
+            # The sync client polls with sleeps; run it on a worker thread so
+            # batch items' Azure round-trips overlap instead of serializing
+            result = await asyncio.to_thread(self._analyze, model_id, file_bytes)
 
             extracted_fields = []
 
@@ -112,19 +128,24 @@ class DocumentExtractor:
                                 f"(confidence: {extracted.confidence:.2f})"
                             )
 
-            # Extract text from layout analysis (for custom processing)
+            # Extract text from layout analysis (for custom processing).
+            # Long documents have thousands of lines: validate them as one
+            # list rather than constructing a model per line.
             if result.pages:
-                for page in result.pages:
-                    if page.lines:
-                        for line in page.lines:
-                            extracted_fields.append(
-                                ExtractedField(
-                                    field_name="text_line",
-                                    value=line.content,
-                                    confidence=1.0,  # OCR text lines
-                                    page_number=page.page_number,
-                                )
-                            )
+                extracted_fields.extend(
+                    EXTRACTED_FIELDS_ADAPTER.validate_python(
+                        [
+                            {
+                                "field_name": "text_line",
+                                "value": line.content,
+                                "confidence": 1.0,  # OCR text lines
+                                "page_number": page.page_number,
+                            }
+                            for page in result.pages
+                            for line in (page.lines or [])
+                        ]
+                    )
+                )
 
             # Extract tables
             if result.tables:
@@ -142,7 +163,7 @@ class DocumentExtractor:
                     extracted_fields.append(
                         ExtractedField(
                             field_name=f"table_{table_idx}",
-                            value=str(table_data),
+                            structured_value=table_data,
                             confidence=1.0,
                         )
                     )
@@ -159,12 +180,7 @@ class DocumentExtractor:
         Extract using layout model — useful for unstructured documents
         where we need full text, tables, and structure.
         """
-        poller = self.client.begin_analyze_document(
-            model_id="prebuilt-layout",
-            analyze_request=AnalyzeDocumentRequest(bytes_source=file_bytes),
-            content_type="application/octet-stream",
-        )
-        return poller.result()
+        return await asyncio.to_thread(self._analyze, "prebuilt-layout", file_bytes)
 
     def check_confidence(self, fields: list[ExtractedField]) -> tuple[bool, list[str]]:
         """
@@ -173,12 +189,10 @@ class DocumentExtractor:
         Returns:
             Tuple of (all_passed, list_of_low_confidence_fields)
         """
-        low_confidence = []
-        for field in fields:
-            if field.confidence < self.confidence_threshold and field.field_name != "text_line":
-                low_confidence.append(
-                    f"{field.field_name}: {field.confidence:.2f} "
-                    f"(threshold: {self.confidence_threshold})"
-                )
-
-        return len(low_confidence) == 0, low_confidence
+        threshold = self.confidence_threshold
+        low_confidence = [
+            f"{field.field_name}: {field.confidence:.2f} (threshold: {threshold})"
+            for field in fields
+            if field.confidence < threshold and field.field_name != "text_line"
+        ]
+        return not low_confidence, low_confidence
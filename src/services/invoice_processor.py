@@ -4,15 +4,49 @@ Leverages Azure AI Document Intelligence prebuilt-invoice model
 for structured extraction of vendor invoices and payment documents.
 """
 
+import asyncio
 import logging
+import string
+from functools import lru_cache
 from ..models.schemas import InvoiceResult, ExtractedField
 
 logger = logging.getLogger(__name__)
 
+# Line-item cell type → the one value_* attribute the SDK populates for it.
+# Other types (dates, integers, addresses, ...) fall back to raw content.
+_TYPED_VALUE_ATTR = {
+    "string": "value_string",
+    "number": "value_number",
+    "currency": "value_currency",
+}
+
+# Thousands separators and currency symbols dropped before float()
+_MONEY_STRIP = str.maketrans("", "", ",$€£")
+
+
+@lru_cache(maxsize=4096)
+def _parse_money(raw: str) -> float:
+    """Parse an amount like "$1,250.00" or "AED 45,000.00" into a float."""
+    return float(raw.translate(_MONEY_STRIP).strip().lstrip(string.ascii_letters))
+
 
 class InvoiceProcessor:
     """Processes invoices using prebuilt-invoice model results."""
 
+    # Prebuilt-invoice field name → InvoiceResult attribute
+    _FIELD_NAME_TO_ATTR = {
+        "VendorName": "vendor_name",
+        "VendorAddress": "vendor_address",
+        "InvoiceId": "invoice_number",
+        "InvoiceDate": "invoice_date",
+        "DueDate": "due_date",
+        "SubTotal": "subtotal",
+        "TotalTax": "tax_amount",
+        "InvoiceTotal": "total_amount",
+        "CurrencyCode": "currency",
+        "PurchaseOrder": "purchase_order",
+    }
+
     async def process(
         self, extracted_fields: list[ExtractedField], raw_result
     ) -> InvoiceResult:
@@ -26,20 +60,21 @@ class InvoiceProcessor:
         Returns:
             Structured InvoiceResult
         """
+        # Field mapping and line-item parsing are CPU-bound: keep it off the event loop
+        return await asyncio.to_thread(self._process_sync, extracted_fields, raw_result)
+
+    def _process_sync(
+        self, extracted_fields: list[ExtractedField], raw_result
+    ) -> InvoiceResult:
+        """Synchronous body of process(); runs in a worker thread."""
         result = InvoiceResult()
-        field_map = {f.field_name: f for f in extracted_fields}
-
-        # Map prebuilt invoice fields to our schema
-        result.vendor_name = field_map.get("VendorName")
-        result.vendor_address = field_map.get("VendorAddress")
-        result.invoice_number = field_map.get("InvoiceId")
-        result.invoice_date = field_map.get("InvoiceDate")
-        result.due_date = field_map.get("DueDate")
-        result.subtotal = field_map.get("SubTotal")
-        result.tax_amount = field_map.get("TotalTax")
-        result.total_amount = field_map.get("InvoiceTotal")
-        result.currency = field_map.get("CurrencyCode")
-        result.purchase_order = field_map.get("PurchaseOrder")
+
+        # Map prebuilt invoice fields to our schema (last occurrence wins)
+        field_to_attr = self._FIELD_NAME_TO_ATTR
+        for field in extracted_fields:
+            attr = field_to_attr.get(field.field_name)
+            if attr is not None:
+                setattr(result, attr, field)
 
         # Extract line items from raw result
         result.line_items = self._extract_line_items(raw_result)
@@ -67,12 +102,12 @@ class InvoiceProcessor:
                     if item.value_object:
                         line_item = {}
                         for key, val in item.value_object.items():
-                            if val.value_string:
-                                line_item[key] = val.value_string
-                            elif val.value_number:
-                                line_item[key] = val.value_number
-                            elif val.value_currency:
-                                line_item[key] = val.value_currency.amount
+                            attr = _TYPED_VALUE_ATTR.get(val.type)
+                            typed = getattr(val, attr) if attr else None
+                            if typed:
+                                line_item[key] = (
+                                    typed.amount if attr == "value_currency" else typed
+                                )
                             elif val.content:
                                 line_item[key] = val.content
                         line_items.append(line_item)
@@ -83,9 +118,9 @@ class InvoiceProcessor:
         """Validate that subtotal + tax = total (flag discrepancies)."""
         try:
             if result.subtotal and result.tax_amount and result.total_amount:
-                subtotal = float(result.subtotal.value.replace(",", "").replace("$", ""))
-                tax = float(result.tax_amount.value.replace(",", "").replace("$", ""))
-                total = float(result.total_amount.value.replace(",", "").replace("$", ""))
+                subtotal = _parse_money(result.subtotal.value)
+                tax = _parse_money(result.tax_amount.value)
+                total = _parse_money(result.total_amount.value)
 
                 expected = subtotal + tax
                 if abs(expected - total) > 0.01:
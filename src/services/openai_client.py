@@ -0,0 +1,47 @@
+"""
+Shared Azure OpenAI client.
+
+One AsyncAzureOpenAI instance per process so every service reuses the same
+HTTP connection pool instead of opening its own. The pool speaks HTTP/2,
+so concurrent classification and KYC calls multiplex over a few TLS
+sessions rather than one connection each.
+"""
+
+from functools import lru_cache
+
+import httpx
+from openai import AsyncAzureOpenAI
+
+from ..config import get_settings
+
+# Connection pool for Azure OpenAI traffic
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+# Fail fast on connect; completions (batched KYC in particular) can take a while
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
+OPENAI_HTTP_RETRIES = 2  # Connection-level retries (refused/reset before a response)
+
+
+@lru_cache(maxsize=None)
+def get_openai_client() -> AsyncAzureOpenAI:
+    """Get the process-wide async Azure OpenAI client."""
+    settings = get_settings()
+    http_client = httpx.AsyncClient(
+        timeout=OPENAI_HTTP_TIMEOUT,
+        # Pool size and HTTP/2 are transport settings once a transport is given
+        transport=httpx.AsyncHTTPTransport(
+            http2=True, limits=OPENAI_HTTP_LIMITS, retries=OPENAI_HTTP_RETRIES
+        ),
+    )
+    return AsyncAzureOpenAI(
+        azure_endpoint=settings.azure_openai_endpoint,
+        api_key=settings.azure_openai_api_key,
+        api_version=settings.azure_openai_api_version,
+        http_client=http_client,
+    )
+
+
+async def close_openai_client() -> None:
+    """Close the shared client's connection pool; called on application shutdown."""
+    if get_openai_client.cache_info().currsize:
+        await get_openai_client().close()
+        get_openai_client.cache_clear()
@@ -0,0 +1,112 @@
+"""
+Cached dependency status for health and readiness probes.
+
+Probes read the last known status with zero network I/O; a background
+task started in the app lifespan refreshes it on a timer
+(stale-while-revalidate). A failed or slow refresh never blocks a probe.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHECK_TIMEOUT_S = 5.0
+
+# Statuses that mean a configured dependency cannot currently be used
+UNHEALTHY_STATUSES = frozenset({"unreachable", "error"})
+
+
+class DependencyStatus(NamedTuple):
+    status: str
+    last_checked: Optional[datetime]
+
+
+class StatusCache:
+    """
+    Last known connectivity of Document Intelligence, Azure OpenAI and
+    the database, refreshed in the background.
+    """
+
+    def __init__(self, storage):
+        settings = get_settings()
+        self.storage = storage
+        self.refresh_interval = settings.status_refresh_interval_s
+        self.endpoints = {
+            "doc_intel": settings.azure_document_intelligence_endpoint,
+            "openai": settings.azure_openai_endpoint,
+        }
+        self.db_configured = bool(settings.database_connection_string)
+        self.statuses: dict[str, DependencyStatus] = {
+            name: DependencyStatus("unknown", None) for name in ("doc_intel", "openai", "db")
+        }
+
+    @property
+    def ready(self) -> bool:
+        """True once every dependency has been checked and none is unhealthy."""
+        return all(
+            s.last_checked is not None and s.status not in UNHEALTHY_STATUSES
+            for s in self.statuses.values()
+        )
+
+    async def refresh(self) -> None:
+        """Re-check every dependency concurrently; keep the old value on failure."""
+        checks = {
+            "doc_intel": self._check_endpoint(self.endpoints["doc_intel"]),
+            "openai": self._check_endpoint(self.endpoints["openai"]),
+            "db": self._check_database(),
+        }
+        outcomes = await asyncio.gather(*checks.values(), return_exceptions=True)
+        now = datetime.now(timezone.utc)
+
+        for name, outcome in zip(checks, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Status check for {name} failed: {outcome}")
+                continue
+            self.statuses[name] = DependencyStatus(outcome, now)
+
+    async def run(self) -> None:
+        """Refresh forever; started as a background task in the app lifespan."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Status refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    @staticmethod
+    async def _check_endpoint(endpoint: str) -> str:
+        """TCP reachability of an Azure endpoint URL."""
+        if not endpoint:
+            return "not_configured"
+
+        url = urlparse(endpoint)
+        host = url.hostname
+        port = url.port or (443 if url.scheme == "https" else 80)
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), timeout=CHECK_TIMEOUT_S
+            )
+        except (OSError, asyncio.TimeoutError):
+            return "unreachable"
+
+        writer.close()
+        await writer.wait_closed()
+        return "reachable"
+
+    async def _check_database(self) -> str:
+        """Round-trip a trivial query; storage falls back to files without a DB."""
+        if not self.db_configured:
+            return "not_configured"
+        try:
+            ok = await asyncio.wait_for(self.storage.ping(), timeout=CHECK_TIMEOUT_S)
+        except Exception as e:
+            logger.warning(f"Database ping failed: {e}")
+            ok = False
+        # Down, or no ODBC driver: documents are still served from files
+        return "connected" if ok else "degraded"
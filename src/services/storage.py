@@ -4,17 +4,51 @@ Stores processed document results in Azure SQL Database
 with full audit trail for banking compliance.
 """
 
-import json
+import asyncio
+import gzip
+import os
 import uuid
 import logging
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional
+from weakref import WeakKeyDictionary
+
+import orjson
 
 from ..config import get_settings
-from ..models.schemas import DocumentProcessResponse
+from ..models.schemas import EXTRACTED_FIELDS_ADAPTER, DocumentProcessResponse
 
 logger = logging.getLogger(__name__)
 
+# aioodbc/pyodbc import — graceful fallback if the driver manager is missing
+try:
+    import aioodbc
+    AIOODBC_AVAILABLE = True
+except ImportError:
+    AIOODBC_AVAILABLE = False
+    logger.warning("aioodbc/pyodbc not available. Using file storage fallback.")
+
+# File fallback location when the database is unavailable
+OUTPUT_DIR = "outputs"
+
+INSERT_RESULT_SQL = """
+    INSERT INTO processed_documents
+    (document_id, document_type, status, classification_confidence,
+     extracted_data, extraction_result, validation_result, processing_time_ms,
+     needs_human_review, review_reason, file_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_AUDIT_SQL = """
+    INSERT INTO audit_log (document_id, action, details)
+    VALUES (?, ?, ?)
+"""
+
+# Both inserts in one batch, so a single save is one round trip
+INSERT_RESULT_WITH_AUDIT_SQL = f"{INSERT_RESULT_SQL};{INSERT_AUDIT_SQL}"
+
 
 class DocumentStorage:
     """
@@ -23,26 +57,103 @@ class DocumentStorage:
     """
 
     def __init__(self):
-        self.connection_string = get_settings().database_connection_string
-        self._connection = None
+        settings = get_settings()
+        self.connection_string = settings.database_connection_string
+        self.pool_min_size = settings.db_pool_min_size
+        self.pool_max_size = settings.db_pool_max_size
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        # After a failed connect, callers use the file fallback until this
+        # monotonic time instead of each retrying create_pool
+        self._pool_retry_interval = settings.status_refresh_interval_s
+        self._pool_retry_after = 0.0
+        self._output_dir_ready = False
+        # Pooled connection → {insert SQL: its reusable cursor} (dropped with the connection)
+        self._insert_cursors: WeakKeyDictionary = WeakKeyDictionary()
 
-    async def _get_connection(self):
-        """Get or create database connection."""
-        if not self._connection:
+    async def _get_pool(self):
+        """Get or create the async connection pool; None if the DB is unreachable."""
+        if (
+            self._pool is None
+            and AIOODBC_AVAILABLE
+            and time.monotonic() >= self._pool_retry_after
+        ):
+            async with self._pool_lock:
+                if self._pool is None and time.monotonic() >= self._pool_retry_after:
+                    try:
+                        self._pool = await aioodbc.create_pool(
+                            dsn=self.connection_string,
+                            minsize=self.pool_min_size,
+                            maxsize=self.pool_max_size,
+                            autocommit=False,
+                        )
+                        logger.info(
+                            f"Database pool established ({self.pool_min_size}-"
+                            f"{self.pool_max_size} connections)"
+                        )
+                    except Exception as e:
+                        self._pool_retry_after = time.monotonic() + self._pool_retry_interval
+                        logger.warning(
+                            f"Database connection failed: {e}. Using file storage "
+                            f"for {self._pool_retry_interval}s before retrying."
+                        )
+        return self._pool
+
+    @asynccontextmanager
+    async def _transaction(self, pool, *statements: str):
+        """
+        Cursor on a pooled connection: commit on success, roll back on error
+        so no half-written transaction goes back into the pool.
+
+        Given INSERT statements, yields a tuple of long-lived cursors instead,
+        one per statement and kept on the connection: pyodbc keeps the last
+        statement prepared on a cursor, so as each cursor only ever runs its
+        own INSERT, repeats skip re-sending and re-preparing the SQL.
+        """
+        async with pool.acquire() as conn:
             try:
-                import pyodbc
+                if statements:
+                    cursors = self._insert_cursors.setdefault(conn, {})
+                    for sql in statements:
+                        if sql not in cursors or cursors[sql].closed:
+                            cursors[sql] = await conn.cursor()
+                    yield tuple(cursors[sql] for sql in statements)
+                else:
+                    async with conn.cursor() as cursor:
+                        yield cursor
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+
+    async def close(self) -> None:
+        """Close the connection pool; called on application shutdown."""
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+            logger.info("Database pool closed")
 
-                self._connection = pyodbc.connect(self.connection_string)
-                logger.info("Database connection established")
-            except Exception as e:
-                logger.warning(f"Database connection failed: {e}. Using in-memory storage.")
-                self._connection = None
-        return self._connection
+    async def ping(self) -> bool:
+        """Check the database connection with a trivial query."""
+        pool = await self._get_pool()
+        if not pool:
+            return False
+
+        try:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("SELECT 1")
+                    await cursor.fetchone()
+            return True
+        except Exception as e:
+            logger.warning(f"Database ping failed: {e}")
+            return False
 
     async def initialize_tables(self):
         """Create required tables if they don't exist."""
-        conn = await self._get_connection()
-        if not conn:
+        pool = await self._get_pool()
+        if not pool:
             logger.warning("Skipping table initialization — no database connection")
             return
 
@@ -54,6 +165,7 @@ class DocumentStorage:
             status NVARCHAR(50) NOT NULL,
             classification_confidence FLOAT,
             extracted_data NVARCHAR(MAX),  -- JSON
+            extraction_result NVARCHAR(MAX),  -- JSON
             validation_result NVARCHAR(MAX),  -- JSON
             processing_time_ms FLOAT,
             needs_human_review BIT DEFAULT 0,
@@ -73,11 +185,23 @@ class DocumentStorage:
             performed_by NVARCHAR(100) DEFAULT 'system',
             timestamp DATETIME2 DEFAULT GETUTCDATE()
         );
+
+        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='document_raw_text')
+        CREATE TABLE document_raw_text (
+            document_id NVARCHAR(50) PRIMARY KEY,
+            content_gzip VARBINARY(MAX) NOT NULL,  -- gzip-compressed UTF-8 text
+            created_at DATETIME2 DEFAULT GETUTCDATE()
+        );
+
+        IF COL_LENGTH('processed_documents', 'extraction_result') IS NULL
+        ALTER TABLE processed_documents ADD extraction_result NVARCHAR(MAX);
+
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='ix_processed_documents_file_hash')
+        CREATE INDEX ix_processed_documents_file_hash ON processed_documents (file_hash);
         """
         try:
-            cursor = conn.cursor()
-            cursor.execute(create_sql)
-            conn.commit()
+            async with self._transaction(pool) as cursor:
+                await cursor.execute(create_sql)
             logger.info("Database tables initialized")
         except Exception as e:
             logger.error(f"Table initialization failed: {e}")
@@ -92,87 +216,263 @@ class DocumentStorage:
         Returns:
             document_id
         """
-        conn = await self._get_connection()
+        pool = await self._get_pool()
 
-        if not conn:
+        if not pool:
             # Fallback: log to file for compliance trail
-            self._save_to_file(result)
+            await self._save_to_files([result])
             return result.document_id
 
         try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO processed_documents 
-                (document_id, document_type, status, classification_confidence,
-                 extracted_data, validation_result, processing_time_ms,
-                 needs_human_review, review_reason)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                result.document_id,
-                result.document_type.value,
-                result.status.value,
-                result.classification_confidence,
-                json.dumps([f.model_dump() for f in result.extracted_fields]),
-                json.dumps(result.validation.model_dump()) if result.validation else None,
-                result.processing_time_ms,
-                result.needs_human_review,
-                result.review_reason,
-            )
-
-            # Audit log entry
-            cursor.execute(
-                """
-                INSERT INTO audit_log (document_id, action, details)
-                VALUES (?, ?, ?)
-                """,
-                result.document_id,
-                "DOCUMENT_PROCESSED",
-                f"Type: {result.document_type.value}, Status: {result.status.value}",
-            )
-
-            conn.commit()
+            async with self._transaction(pool, INSERT_RESULT_WITH_AUDIT_SQL) as (cursor,):
+                # Result row and its audit log entry
+                await cursor.execute(
+                    INSERT_RESULT_WITH_AUDIT_SQL,
+                    *self._result_row(result),
+                    *self._audit_row(result),
+                )
             logger.info(f"Document saved: {result.document_id}")
             return result.document_id
 
         except Exception as e:
             logger.error(f"Database save failed: {e}")
-            self._save_to_file(result)
+            await self._save_to_files([result])
             return result.document_id
 
+    async def save_results_bulk(self, results: list[DocumentProcessResponse]) -> list[str]:
+        """
+        Save a batch of processed results in a single transaction.
+
+        Args:
+            results: Document processing responses from one batch
+
+        Returns:
+            List of saved document_ids
+        """
+        if not results:
+            return []
+
+        pool = await self._get_pool()
+
+        if not pool:
+            await self._save_to_files(results)
+            return [r.document_id for r in results]
+
+        try:
+            async with self._transaction(pool, INSERT_RESULT_SQL, INSERT_AUDIT_SQL) as (
+                result_cursor,
+                audit_cursor,
+            ):
+                await result_cursor.executemany(
+                    INSERT_RESULT_SQL, [self._result_row(r) for r in results]
+                )
+                await audit_cursor.executemany(
+                    INSERT_AUDIT_SQL, [self._audit_row(r) for r in results]
+                )
+            logger.info(f"Batch saved: {len(results)} documents")
+        except Exception as e:
+            logger.error(f"Database bulk save failed: {e}")
+            await self._save_to_files(results)
+
+        return [r.document_id for r in results]
+
     async def get_result(self, document_id: str) -> Optional[dict]:
         """Retrieve a processed document by ID."""
-        conn = await self._get_connection()
-        if not conn:
+        pool = await self._get_pool()
+        if not pool:
             return None
 
         try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM processed_documents WHERE document_id = ?",
-                document_id,
-            )
-            row = cursor.fetchone()
-            if row:
-                columns = [desc[0] for desc in cursor.description]
-                return dict(zip(columns, row))
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        "SELECT * FROM processed_documents WHERE document_id = ?",
+                        document_id,
+                    )
+                    row = await cursor.fetchone()
+                    if row:
+                        columns = [desc[0] for desc in cursor.description]
+                        return dict(zip(columns, row))
             return None
         except Exception as e:
             logger.error(f"Database retrieval failed: {e}")
             return None
 
-    def _save_to_file(self, result: DocumentProcessResponse):
-        """Fallback: save to JSON file when database is unavailable."""
-        import os
+    async def save_raw_text(self, document_id: str, raw_text: str) -> None:
+        """
+        Store the full OCR text of a document, gzip-compressed and kept
+        separate from the result record so results stay small.
+        """
+        content_gzip = gzip.compress(raw_text.encode("utf-8"), compresslevel=6)
+        pool = await self._get_pool()
+
+        if not pool:
+            await self._save_raw_text_to_file(document_id, content_gzip)
+            return
+
+        try:
+            async with self._transaction(pool) as cursor:
+                await cursor.execute(
+                    "INSERT INTO document_raw_text (document_id, content_gzip) VALUES (?, ?)",
+                    document_id,
+                    content_gzip,
+                )
+        except Exception as e:
+            logger.error(f"Raw text save failed: {e}")
+            await self._save_raw_text_to_file(document_id, content_gzip)
+
+    async def get_raw_text_gzip(self, document_id: str) -> Optional[bytes]:
+        """Retrieve the gzip-compressed OCR text of a document."""
+        pool = await self._get_pool()
+        if not pool:
+            return await asyncio.to_thread(self._load_raw_text_from_file, document_id)
+
+        try:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        "SELECT content_gzip FROM document_raw_text WHERE document_id = ?",
+                        document_id,
+                    )
+                    row = await cursor.fetchone()
+            return bytes(row.content_gzip) if row else None
+        except Exception as e:
+            logger.error(f"Raw text retrieval failed: {e}")
+            return None
+
+    async def get_result_by_hash(self, file_hash: str) -> Optional[dict]:
+        """
+        Look up a completed result for previously processed file content.
+
+        Returns:
+            DocumentProcessResponse-compatible dict, or None if not found
+        """
+        pool = await self._get_pool()
+        if not pool:
+            return await asyncio.to_thread(self._load_from_file_by_hash, file_hash)
+
+        try:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        """
+                        SELECT TOP 1 document_id, document_type, status,
+                               classification_confidence, extracted_data,
+                               extraction_result, validation_result, processing_time_ms,
+                               needs_human_review, review_reason, created_at
+                        FROM processed_documents
+                        WHERE file_hash = ? AND status = 'completed'
+                        ORDER BY created_at DESC
+                        """,
+                        file_hash,
+                    )
+                    row = await cursor.fetchone()
+            if not row:
+                return None
+            return {
+                "document_id": row.document_id,
+                "status": row.status,
+                "document_type": row.document_type,
+                "classification_confidence": row.classification_confidence,
+                "extracted_fields": orjson.loads(row.extracted_data or "[]"),
+                "extraction_result": (
+                    orjson.loads(row.extraction_result) if row.extraction_result else None
+                ),
+                "validation": (
+                    orjson.loads(row.validation_result) if row.validation_result else None
+                ),
+                "processing_time_ms": row.processing_time_ms,
+                "needs_human_review": bool(row.needs_human_review),
+                "review_reason": row.review_reason,
+                "created_at": row.created_at,
+                "file_hash": file_hash,
+            }
+        except Exception as e:
+            logger.error(f"Database hash lookup failed: {e}")
+            return None
+
+    @staticmethod
+    def _result_row(result: DocumentProcessResponse) -> tuple:
+        """Parameters for INSERT_RESULT_SQL."""
+        return (
+            result.document_id,
+            result.document_type.value,
+            result.status.value,
+            result.classification_confidence,
+            EXTRACTED_FIELDS_ADAPTER.dump_json(result.extracted_fields).decode(),
+            result.extraction_result.model_dump_json() if result.extraction_result else None,
+            result.validation.model_dump_json() if result.validation else None,
+            result.processing_time_ms,
+            result.needs_human_review,
+            result.review_reason,
+            result.file_hash,
+        )
+
+    @staticmethod
+    def _audit_row(result: DocumentProcessResponse) -> tuple:
+        """Parameters for INSERT_AUDIT_SQL."""
+        return (
+            result.document_id,
+            "DOCUMENT_PROCESSED",
+            f"Type: {result.document_type.value}, Status: {result.status.value}",
+        )
 
-        output_dir = "outputs"
-        os.makedirs(output_dir, exist_ok=True)
-        filepath = os.path.join(output_dir, f"{result.document_id}.json")
+    async def _save_to_files(self, results: list[DocumentProcessResponse]):
+        """Fallback: save results to JSON files when database is unavailable."""
+        files = []
+        for result in results:
+            filepath = os.path.join(OUTPUT_DIR, f"{result.document_id}.json")
+            files.append(
+                (filepath, result.model_dump_json(indent=2, exclude={"raw_text"}).encode())
+            )
+            if result.file_hash:
+                pointer_path = os.path.join(OUTPUT_DIR, f"hash_{result.file_hash}.json")
+                files.append((pointer_path, orjson.dumps({"document_id": result.document_id})))
 
-        with open(filepath, "w") as f:
-            json.dump(result.model_dump(mode="json"), f, indent=2, default=str)
+        await asyncio.to_thread(self._write_output_files, files)
+        for result in results:
+            logger.info(f"Result saved to file: {OUTPUT_DIR}/{result.document_id}.json")
 
-        logger.info(f"Result saved to file: {filepath}")
+    async def _save_raw_text_to_file(self, document_id: str, content_gzip: bytes):
+        """Fallback: save compressed OCR text next to the JSON result."""
+        path = os.path.join(OUTPUT_DIR, f"{document_id}_raw.txt.gz")
+        await asyncio.to_thread(self._write_output_files, [(path, content_gzip)])
+
+    def _write_output_files(self, files: list[tuple[str, bytes]]):
+        """
+        Write each (path, data) pair with a single write() call; runs in a
+        worker thread so the fallback never blocks the event loop.
+        """
+        if not self._output_dir_ready:
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            self._output_dir_ready = True
+
+        for path, data in files:
+            with open(path, "wb") as f:
+                f.write(data)
+
+    def _load_raw_text_from_file(self, document_id: str) -> Optional[bytes]:
+        """Fallback: read compressed OCR text saved by _save_raw_text_to_file."""
+        path = os.path.join(OUTPUT_DIR, f"{document_id}_raw.txt.gz")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _load_from_file_by_hash(self, file_hash: str) -> Optional[dict]:
+        """Fallback: resolve a content hash via its pointer file in outputs/."""
+        pointer_path = os.path.join(OUTPUT_DIR, f"hash_{file_hash}.json")
+        if not os.path.exists(pointer_path):
+            return None
+
+        try:
+            with open(pointer_path, "rb") as f:
+                document_id = orjson.loads(f.read())["document_id"]
+            with open(os.path.join(OUTPUT_DIR, f"{document_id}.json"), "rb") as f:
+                return orjson.loads(f.read())
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Hash pointer {file_hash[:12]}... unreadable: {e}")
+            return None
 
     @staticmethod
     def generate_document_id() -> str:
@@ -5,9 +5,12 @@ including sanctions screening, PEP checks, and field completeness.
 """
 
 import logging
-from datetime import datetime, date
+import re
+from datetime import date
+from ..models.field_index import FieldIndex
 from ..models.schemas import ValidationResult, ExtractedField
 from ..models.enums import ValidationStatus
+from ..utils.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +22,10 @@ REQUIRED_KYC_FIELDS = [
     "source_of_funds",
     "occupation",
 ]
+_REQUIRED_KYC_FIELDS_SET = frozenset(REQUIRED_KYC_FIELDS)
+
+# Minimum confidence for the required KYC fields
+CRITICAL_FIELD_MIN_CONFIDENCE = 0.80
 
 # Simplified sanctions list (in production, use a proper sanctions API)
 SANCTIONS_KEYWORDS = [
@@ -36,6 +43,35 @@ FATF_INCREASED_MONITORING = [
     "Haiti", "Nigeria", "Philippines",
 ]
 
+# Built once at import: one automaton scan per name, O(1) country lookups
+_SANCTIONS_MATCHER = KeywordMatcher(SANCTIONS_KEYWORDS)
+_FATF_HIGH_RISK_SET = frozenset(FATF_HIGH_RISK)
+_FATF_INCREASED_MONITORING_SET = frozenset(FATF_INCREASED_MONITORING)
+
+# Expiry date layouts, matched before any parsing: YYYY-MM-DD, then
+# DD/MM/YYYY or MM/DD/YYYY (day-first wins when both are valid dates)
+_ISO_DATE_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})", re.ASCII)
+_SLASH_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})", re.ASCII)
+
+
+def _parse_expiry_date(value: str) -> date | None:
+    """Parse an ID expiry date in a supported layout; None if unrecognized."""
+    if match := _ISO_DATE_RE.fullmatch(value):
+        year, month, day = match.groups()
+        candidates = ((year, month, day),)
+    elif match := _SLASH_DATE_RE.fullmatch(value):
+        first, second, year = match.groups()
+        candidates = ((year, second, first), (year, first, second))
+    else:
+        return None
+
+    for year, month, day in candidates:
+        try:
+            return date(int(year), int(month), int(day))
+        except ValueError:  # Out-of-range month/day for this layout
+            continue
+    return None
+
 
 class KYCAMLValidator:
     """
@@ -44,7 +80,10 @@ class KYCAMLValidator:
     """
 
     async def validate_kyc(
-        self, extracted_fields: list[ExtractedField], document_type: str
+        self,
+        extracted_fields: list[ExtractedField],
+        document_type: str,
+        index: FieldIndex | None = None,
     ) -> ValidationResult:
         """
         Run full KYC/AML validation suite on extracted data.
@@ -52,6 +91,7 @@ class KYCAMLValidator:
         Args:
             extracted_fields: Extracted document fields
             document_type: Type of document being validated
+            index: FieldIndex of extracted_fields, if the caller already built one
 
         Returns:
             ValidationResult with pass/fail status and flags
@@ -61,7 +101,7 @@ class KYCAMLValidator:
         flags = []
         risk_score = 0.0
 
-        field_map = {f.field_name: f for f in extracted_fields}
+        field_map = (index or FieldIndex(extracted_fields)).by_name
 
         # ── Check 1: Field Completeness ──────────────────────────
         completeness_ok = self._check_field_completeness(
@@ -159,24 +199,15 @@ class KYCAMLValidator:
         """Check if ID document is valid (not expired)."""
         expiry_field = field_map.get("expiry_date") or field_map.get("id_expiry")
         if expiry_field and expiry_field.value:
-            try:
-                # Try parsing common date formats
-                for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y"):
-                    try:
-                        expiry = datetime.strptime(expiry_field.value, fmt).date()
-                        if expiry < date.today():
-                            failed.append(f"ID document expired: {expiry_field.value}")
-                            return False
-                        else:
-                            passed.append("ID document is valid and not expired")
-                            return True
-                    except ValueError:
-                        continue
+            expiry = _parse_expiry_date(expiry_field.value)
+            if expiry is None:
                 passed.append("ID expiry date format unrecognized — manual check needed")
                 return True
-            except Exception:
-                passed.append("ID expiry check skipped — parsing error")
-                return True
+            if expiry < date.today():
+                failed.append(f"ID document expired: {expiry_field.value}")
+                return False
+            passed.append("ID document is valid and not expired")
+            return True
         else:
             passed.append("ID expiry check skipped — no expiry field found")
             return True
@@ -187,12 +218,10 @@ class KYCAMLValidator:
         """Screen customer name against sanctions list."""
         name_field = field_map.get("customer_name") or field_map.get("full_name")
         if name_field and name_field.value:
-            name_lower = name_field.value.lower()
-            for sanctioned in SANCTIONS_KEYWORDS:
-                if sanctioned.lower() in name_lower:
-                    failed.append(f"SANCTIONS MATCH: {name_field.value}")
-                    flags.append("SANCTIONS_HIT")
-                    return False
+            if _SANCTIONS_MATCHER.find(name_field.value):
+                failed.append(f"SANCTIONS MATCH: {name_field.value}")
+                flags.append("SANCTIONS_HIT")
+                return False
             passed.append("Sanctions screening: CLEAR")
             return True
         passed.append("Sanctions screening skipped — no name found")
@@ -205,11 +234,11 @@ class KYCAMLValidator:
         nationality = field_map.get("nationality")
         if nationality and nationality.value:
             country = nationality.value.strip()
-            if country in FATF_HIGH_RISK:
+            if country in _FATF_HIGH_RISK_SET:
                 failed.append(f"FATF High-Risk Jurisdiction: {country}")
                 flags.append("FATF_HIGH_RISK")
                 return False
-            elif country in FATF_INCREASED_MONITORING:
+            elif country in _FATF_INCREASED_MONITORING_SET:
                 failed.append(f"FATF Increased Monitoring: {country}")
                 flags.append("FATF_MONITORING")
                 return False
@@ -239,12 +268,12 @@ class KYCAMLValidator:
         self, fields: list[ExtractedField], passed: list, failed: list
     ) -> bool:
         """Check that critical fields meet confidence thresholds."""
-        low_confidence_fields = [
-            f for f in fields
-            if f.confidence < 0.80 and f.field_name in REQUIRED_KYC_FIELDS
+        names = [
+            f.field_name for f in fields
+            if f.confidence < CRITICAL_FIELD_MIN_CONFIDENCE
+            and f.field_name in _REQUIRED_KYC_FIELDS_SET
         ]
-        if low_confidence_fields:
-            names = [f.field_name for f in low_confidence_fields]
+        if names:
             failed.append(f"Low confidence on critical fields: {', '.join(names)}")
             return False
         passed.append("All critical fields meet confidence threshold")
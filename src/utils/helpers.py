@@ -1,18 +1,33 @@
 """Common helper functions for the banking document pipeline."""
 
-import hashlib
 import os
 from pathlib import Path
-from datetime import datetime
+from typing import Iterable
+from time import gmtime, strftime
+
+from blake3 import blake3
+
+
+def new_file_hasher():
+    """
+    Create an incremental hasher matching compute_file_hash.
+
+    BLAKE3 (256-bit): SIMD-parallel, several times faster than both
+    SHA-256 and BLAKE2b on multi-MB uploads. Digests are 64 hex chars,
+    the width of the file_hash column.
+    """
+    return blake3()
 
 
 def compute_file_hash(file_bytes: bytes) -> str:
-    """Compute SHA-256 hash of file for deduplication and audit."""
-    return hashlib.sha256(file_bytes).hexdigest()
+    """Compute BLAKE3 hash of file for deduplication and audit."""
+    return blake3(file_bytes).hexdigest()
 
 
-def validate_file_extension(filename: str, allowed: list[str]) -> bool:
-    """Check if file extension is in allowed list."""
+def validate_file_extension(filename: str, allowed: Iterable[str]) -> bool:
+    """Check if file extension is in allowed set (pass a frozenset for O(1) lookup)."""
+    if not isinstance(allowed, (set, frozenset)):
+        allowed = frozenset(allowed)
     ext = Path(filename).suffix.lower().lstrip(".")
     return ext in allowed
 
@@ -34,11 +49,25 @@ def mask_sensitive_data(value: str, visible_chars: int = 4) -> str:
 
 def generate_audit_filename(document_id: str, extension: str = "json") -> str:
     """Generate timestamped audit filename."""
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    timestamp = strftime("%Y%m%d_%H%M%S", gmtime())
     return f"{document_id}_{timestamp}.{extension}"
 
 
+_FILENAME_KEEPCHARS = frozenset(" ._-")
+
+# Deletes every ASCII character that is neither alphanumeric nor a keepchar
+_FILENAME_ASCII_STRIP = str.maketrans(
+    "",
+    "",
+    "".join(
+        c for c in map(chr, range(128)) if not (c.isalnum() or c in _FILENAME_KEEPCHARS)
+    ),
+)
+
+
 def sanitize_filename(filename: str) -> str:
     """Remove potentially dangerous characters from filenames."""
-    keepchars = (" ", ".", "_", "-")
-    return "".join(c for c in filename if c.isalnum() or c in keepchars).rstrip()
+    if filename.isascii():
+        return filename.translate(_FILENAME_ASCII_STRIP).rstrip()
+    # Non-ASCII letters/digits are kept, so check each character
+    return "".join(c for c in filename if c.isalnum() or c in _FILENAME_KEEPCHARS).rstrip()
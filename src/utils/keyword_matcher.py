@@ -0,0 +1,39 @@
+"""
+Case-insensitive multi-keyword substring matching for screening lists.
+"""
+
+from typing import Iterable, Optional
+
+# pyahocorasick finds every keyword in one pass over the text (C automaton).
+# Falls back to a per-keyword substring loop.
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+class KeywordMatcher:
+    """Finds which of a fixed set of keywords occur inside a text."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(dict.fromkeys(k.lower() for k in keywords if k))
+        self._automaton = None
+        if AHOCORASICK_AVAILABLE and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def find(self, text: str) -> Optional[str]:
+        """Return a keyword contained in text (ignoring case), or None."""
+        text = text.lower()
+        if self._automaton is not None:
+            for _, keyword in self._automaton.iter(text):
+                return keyword
+            return None
+        for keyword in self.keywords:
+            if keyword in text:
+                return keyword
+        return None
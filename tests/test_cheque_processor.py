@@ -0,0 +1,106 @@
+"""Tests for cheque field extraction."""
+
+import pytest
+from types import SimpleNamespace
+from src.models.schemas import ExtractedField
+from src.services.cheque_processor import ChequeProcessor
+
+
+@pytest.fixture
+def processor():
+    return ChequeProcessor()
+
+
+def _lines(*values: str) -> list[ExtractedField]:
+    return [
+        ExtractedField(field_name="text_line", value=v, confidence=0.95) for v in values
+    ]
+
+
+@pytest.mark.asyncio
+async def test_full_cheque_extraction(processor):
+    """Typical UAE cheque → all text-derived fields populated."""
+    fields = _lines(
+        "Emirates NBD",
+        "Date: 15/03/2025",
+        "Pay: Ahmed Ali Trading LLC or order",
+        "Dirhams Fifty Thousand Only",
+        "AED 50,000.00",
+        "⑆123456⑆ ⑇044123456⑇ 1012345678",
+    )
+    result = await processor.process(fields, None)
+
+    assert result.cheque_number.value == "123456"
+    assert result.micr_code.value == "123456 044123456 1012345678"
+    assert result.account_number.value == "1012345678"
+    assert result.bank_name.value == "Emirates NBD"
+    assert result.amount_in_figures.value == "50000.00"
+    assert result.amount_in_words.value == "Fifty Thousand"
+    assert result.cheque_date.value == "15/03/2025"
+    assert result.payee_name.value == "Ahmed Ali Trading LLC"
+    assert result.signature_detected is False
+
+
+@pytest.mark.asyncio
+async def test_pattern_priority_and_fallbacks(processor):
+    """Earlier patterns win; later ones apply only when earlier ones miss."""
+    fields = _lines(
+        "12 Jan 2024",
+        "*** 1,250.50 ***",
+        "000123 002000123 99887766",
+    )
+    result = await processor.process(fields, None)
+
+    assert result.amount_in_figures.value == "1250.50"
+    assert result.cheque_date.value == "12 Jan 2024"
+    assert result.cheque_number.value == "000123"
+    assert result.bank_name.value == "HDFC Bank"
+
+
+@pytest.mark.asyncio
+async def test_non_text_fields_ignored(processor):
+    """Only text_line fields feed the pattern scan."""
+    fields = [
+        ExtractedField(field_name="kv_Amount", value="AED 99.00", confidence=0.9),
+        *_lines("no cheque data here"),
+    ]
+    result = await processor.process(fields, None)
+
+    assert result.amount_in_figures is None
+    assert result.cheque_number is None
+    assert result.payee_name is None
+
+
+def _page(polygons, width=8.5, height=3.5):
+    lines = [SimpleNamespace(polygon=p) for p in polygons]
+    return SimpleNamespace(pages=[SimpleNamespace(width=width, height=height, lines=lines)])
+
+
+@pytest.mark.parametrize(
+    "polygons, expected",
+    [
+        # Only top-left text
+        ([[0.5, 0.5, 2.0, 0.5, 2.0, 0.8, 0.5, 0.8]], False),
+        # One line reaching into the bottom-right quadrant
+        (
+            [
+                [0.5, 0.5, 2.0, 0.5, 2.0, 0.8, 0.5, 0.8],
+                [5.0, 2.9, 7.5, 2.9, 7.5, 3.2, 5.0, 3.2],
+            ],
+            True,
+        ),
+        # Bottom-left and top-right only — neither is in the quadrant
+        (
+            [
+                [0.5, 3.0, 2.0, 3.0, 2.0, 3.3, 0.5, 3.3],
+                [6.0, 0.2, 8.0, 0.2, 8.0, 0.5, 6.0, 0.5],
+            ],
+            False,
+        ),
+        # Ragged vertex counts fall back to the per-line check
+        ([[0.5, 0.5, 2.0, 0.5], [5.0, 2.9, 7.5, 2.9, 7.5, 3.2]], True),
+        ([None, []], False),
+    ],
+)
+def test_signature_region_detection(processor, polygons, expected):
+    assert processor._detect_signature_region(_page(polygons)) is expected
@@ -0,0 +1,230 @@
+"""Tests for the document upload routes."""
+
+import json
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from src.config import get_settings
+from src.deps import settings_dep
+from src.models.enums import DocumentType, ProcessingStatus
+from src.models.schemas import DocumentProcessResponse, ExtractedField
+from src.routers import documents
+from src.services.extractor import DocumentExtractor
+from src.services.kyc_processor import KYCProcessor
+from src.utils.helpers import compute_file_hash
+
+STORED_PDF = b"%PDF- already processed"
+
+
+class _FakeExtractor:
+    def __init__(self):
+        self.calls = 0
+
+    async def extract(self, file_bytes, doc_type):
+        self.calls += 1
+        if b"corrupt" in file_bytes:
+            raise ValueError("unreadable document")
+        fields = [ExtractedField(field_name="Reference", value="TF-1", confidence=0.95)]
+        return fields, SimpleNamespace(pages=[object()], content="Reference TF-1")
+
+    def check_confidence(self, fields):
+        return True, []
+
+
+class _SlowAnalyzeClient:
+    """Sync Document Intelligence client stub; records how many analyses overlap."""
+
+    def __init__(self):
+        self.active = self.max_active = 0
+        self._lock = threading.Lock()
+
+    def begin_analyze_document(self, analyze_request, **kwargs):
+        # OCR text is the upload's own content, so every document is distinct
+        text = analyze_request.bytes_source.decode()
+        return SimpleNamespace(result=lambda: self._result(text))
+
+    def _result(self, text):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.2)  # Polling the Azure operation
+        with self._lock:
+            self.active -= 1
+        line = SimpleNamespace(content=text)
+        page = SimpleNamespace(page_number=1, lines=[line])
+        return SimpleNamespace(documents=None, pages=[page], tables=None, content=line.content)
+
+
+class _FakeCompletions:
+    """Answers GPT-4o KYC requests with each document's text as customer_name."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        docs = json.loads(kwargs["messages"][1]["content"].split("\n\n", 1)[1])["documents"]
+        body = {"results": [{"id": d["id"], "customer_name": d["text"]} for d in docs]}
+        message = SimpleNamespace(content=json.dumps(body))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class _FakeClassifier:
+    def __init__(self):
+        self.calls = 0
+
+    async def classify(self, file_bytes, filename, file_hash=None):
+        self.calls += 1
+        return DocumentType.TRADE_FINANCE, 0.9, "stub"
+
+
+class _FakeStorage:
+    """Knows one previously processed document, keyed by STORED_PDF's hash."""
+
+    def __init__(self):
+        stored = DocumentProcessResponse(
+            document_id="DOC-STORED",
+            status=ProcessingStatus.COMPLETED,
+            document_type=DocumentType.TRADE_FINANCE,
+            classification_confidence=0.9,
+            processing_time_ms=1.0,
+            file_hash=compute_file_hash(STORED_PDF),
+        )
+        self.by_hash = {stored.file_hash: stored.model_dump(mode="json")}
+        self.saved = []
+        self.bulk_saves = []
+
+    async def get_result_by_hash(self, file_hash):
+        return self.by_hash.get(file_hash)
+
+    async def save_result(self, result):
+        self.saved.append(result)
+
+    async def save_results_bulk(self, results):
+        self.bulk_saves.append(results)
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    stubs = SimpleNamespace(
+        extractor=_FakeExtractor(), classifier=_FakeClassifier(), storage=_FakeStorage()
+    )
+    monkeypatch.setattr(documents, "get_extractor", lambda: stubs.extractor)
+    monkeypatch.setattr(documents, "get_classifier", lambda: stubs.classifier)
+    monkeypatch.setattr(documents, "get_storage", lambda: stubs.storage)
+    return stubs
+
+
+@pytest.fixture
+def client(monkeypatch, stubs):
+    for var in (
+        "AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT",
+        "AZURE_DOCUMENT_INTELLIGENCE_KEY",
+        "AZURE_OPENAI_ENDPOINT",
+        "AZURE_OPENAI_API_KEY",
+    ):
+        monkeypatch.setenv(var, "https://example.test/")
+    monkeypatch.setenv("MAX_FILE_SIZE_MB", "1")
+    get_settings.cache_clear()
+    from src.main import app
+
+    # No lifespan: the Azure services and storage are all stubbed
+    app.dependency_overrides[settings_dep] = get_settings
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    get_settings.cache_clear()
+
+
+def _pdf(name: str, content: bytes) -> tuple:
+    return name, content, "application/pdf"
+
+
+def test_oversized_upload_rejected(client, stubs):
+    too_big = b"%PDF-" + b"0" * (1024 * 1024)
+
+    r = client.post("/api/v1/documents/process", files={"file": _pdf("big.pdf", too_big)})
+
+    assert r.status_code == 413
+    assert stubs.classifier.calls == stubs.extractor.calls == 0
+
+
+def test_duplicate_upload_returns_stored_result(client, stubs):
+    r = client.post("/api/v1/documents/process", files={"file": _pdf("a.pdf", STORED_PDF)})
+
+    assert r.status_code == 200
+    assert r.json()["document_id"] == "DOC-STORED"
+    assert stubs.classifier.calls == stubs.extractor.calls == 0
+    assert stubs.storage.saved == []
+
+
+def test_new_upload_is_processed_and_saved(client, stubs):
+    r = client.post("/api/v1/documents/process", files={"file": _pdf("a.pdf", b"%PDF- new")})
+
+    assert r.status_code == 200
+    assert r.json()["document_type"] == DocumentType.TRADE_FINANCE
+    assert [s.document_id for s in stubs.storage.saved] == [r.json()["document_id"]]
+
+
+def test_batch_counts_and_saves_only_new_results(client, stubs):
+    files = [
+        ("files", _pdf("new.pdf", b"%PDF- new")),
+        ("files", _pdf("seen.pdf", STORED_PDF)),
+        ("files", _pdf("bad.pdf", b"%PDF- corrupt")),
+        ("files", ("macro.exe", b"MZ", "application/octet-stream")),
+        ("files", _pdf("big.pdf", b"0" * (1024 * 1024 + 1))),
+    ]
+
+    r = client.post("/api/v1/documents/batch", files=files)
+
+    body = r.json()
+    assert r.status_code == 200
+    assert body["total_documents"] == 5
+    assert body["failure_count"] == 2  # Unsupported type and oversized, rejected up front
+    assert body["success_count"] == 2  # New and duplicate; the extraction error failed
+    assert body["review_count"] == 1
+    statuses = {res["document_id"]: res["status"] for res in body["results"]}
+    assert len(statuses) == 3 and statuses["DOC-STORED"] == ProcessingStatus.COMPLETED
+    assert stubs.extractor.calls == 2
+
+    (saved,) = stubs.storage.bulk_saves
+    new_id = next(
+        res["document_id"] for res in body["results"]
+        if res["document_id"] != "DOC-STORED" and res["status"] == ProcessingStatus.COMPLETED
+    )
+    assert [s.document_id for s in saved] == [new_id]
+
+
+def test_batch_items_analyzed_concurrently(client, stubs, monkeypatch):
+    extractor = DocumentExtractor()
+    extractor.client = _SlowAnalyzeClient()
+    monkeypatch.setattr(documents, "get_extractor", lambda: extractor)
+    files = [("files", _pdf(f"{i}.pdf", f"%PDF- doc {i}".encode())) for i in range(4)]
+
+    r = client.post("/api/v1/documents/batch", files=files)
+
+    assert r.status_code == 200
+    assert r.json()["success_count"] == 4
+    assert extractor.client.max_active == 4
+
+
+def test_batch_kyc_forms_share_one_request(client, stubs, monkeypatch):
+    """Forms from one upload reach the KYC micro-batcher together."""
+    extractor = DocumentExtractor()
+    extractor.client = _SlowAnalyzeClient()
+    monkeypatch.setattr(documents, "get_extractor", lambda: extractor)
+    kyc = KYCProcessor()
+    kyc.client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
+    monkeypatch.setattr(documents, "get_kyc_processor", lambda: kyc)
+    names = [f"Customer {i}" for i in range(3)]
+    files = [("files", _pdf(f"{i}.pdf", name.encode())) for i, name in enumerate(names)]
+
+    r = client.post(
+        "/api/v1/documents/batch", files=files, data={"document_type": DocumentType.KYC_FORM.value}
+    )
+
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [res["extraction_result"]["customer_name"]["value"] for res in results] == names
+    assert kyc.client.chat.completions.calls == 1
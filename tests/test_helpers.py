@@ -0,0 +1,27 @@
+"""Tests for common helper functions."""
+
+import pytest
+from src.utils.helpers import compute_file_hash, new_file_hasher, sanitize_filename
+
+
+@pytest.mark.parametrize(
+    "filename, expected",
+    [
+        ("invoice_2024-01.pdf", "invoice_2024-01.pdf"),
+        ("../../etc/passwd", "....etcpasswd"),
+        ("a<b>c:d|e?.png  ", "abcde.png"),
+        ("فاتورة رقم 7.pdf", "فاتورة رقم 7.pdf"),
+        ("chèque/№1.jpg", "chèque1.jpg"),
+    ],
+)
+def test_sanitize_filename(filename, expected):
+    assert sanitize_filename(filename) == expected
+
+
+def test_incremental_hash_matches_one_shot():
+    data = b"%PDF-1.7 " * 10_000
+    hasher = new_file_hasher()
+    for start in range(0, len(data), 4096):
+        hasher.update(data[start:start + 4096])
+    assert hasher.hexdigest() == compute_file_hash(data)
+    assert len(compute_file_hash(data)) == 64
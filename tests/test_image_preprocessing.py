@@ -0,0 +1,81 @@
+"""Tests for image preprocessing."""
+
+import cv2
+import numpy as np
+import pytest
+from src.utils.image_preprocessing import ImagePreprocessor
+
+
+def _ruled_page(angle: float, scale: int = 1) -> np.ndarray:
+    """A page of long horizontal rules, rotated by angle degrees."""
+    h, w = 600 * scale, 800 * scale
+    page = np.full((h, w, 3), 235, np.uint8)
+    for y in range(80 * scale, h - 40 * scale, 40 * scale):
+        cv2.line(page, (60 * scale, y), (w - 60 * scale, y), (20, 20, 20), 2 * scale)
+    rotation = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(page, rotation, (w, h), borderMode=cv2.BORDER_REPLICATE)
+
+
+def _rule_angle(image: np.ndarray) -> float:
+    edges = cv2.Canny(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), 50, 150)
+    lines = cv2.HoughLinesP(edges, 1, np.pi / 180, 100, minLineLength=300, maxLineGap=10)
+    seg = lines.reshape(-1, 4).astype(float)
+    return float(np.median(np.degrees(np.arctan2(seg[:, 3] - seg[:, 1], seg[:, 2] - seg[:, 0]))))
+
+
+@pytest.mark.parametrize("angle", [-6.0, 4.0])
+@pytest.mark.parametrize("scale", [1, 3])  # 3 → skew measured on a downsampled copy
+def test_deskew_straightens_rules(angle, scale):
+    deskewed = ImagePreprocessor.deskew(_ruled_page(angle, scale))
+    assert abs(_rule_angle(deskewed)) < 0.5
+
+
+def test_deskew_leaves_straight_page_untouched():
+    page = _ruled_page(0.0)
+    assert ImagePreprocessor.deskew(page) is page
+
+
+@pytest.mark.parametrize("pipeline", ["preprocess_cheque", "preprocess_id_card", "preprocess_form"])
+def test_umat_pipeline_matches_numpy(pipeline):
+    # Faded and noisy, so the denoise and contrast stages run too
+    page = _ruled_page(3.0).astype(np.float32) * 0.3 + 150
+    page += np.random.default_rng(0).normal(0, 4, page.shape)
+    image_bytes = cv2.imencode(".png", np.clip(page, 0, 255).astype(np.uint8))[1].tobytes()
+    umat = ImagePreprocessor()
+    umat.use_opencl = True  # Without an OpenCL device, UMat ops run on the CPU
+    assert getattr(umat, pipeline)(image_bytes) == getattr(ImagePreprocessor(), pipeline)(image_bytes)
+
+
+@pytest.mark.parametrize("scale, expected_width", [(1, 1600), (3, 3508), (5, 4000)])
+def test_cheque_upscale_capped_at_print_resolution(scale, expected_width):
+    """Small captures are doubled for OCR; large ones stay within MAX_DECODE_DIM."""
+    image_bytes = cv2.imencode(".png", _ruled_page(0.0, scale))[1].tobytes()
+    output = cv2.imdecode(
+        np.frombuffer(ImagePreprocessor().preprocess_cheque(image_bytes), np.uint8),
+        cv2.IMREAD_COLOR,
+    )
+    assert output.shape[1] == expected_width
+
+
+def test_stage_gates():
+    from src.utils.image_preprocessing import _needs_clahe, _needs_denoise
+
+    gray = cv2.cvtColor(_ruled_page(0.0), cv2.COLOR_BGR2GRAY)
+    gray[::3] = 15  # Dense dark rows: a high-contrast page
+    noisy = np.clip(gray + np.random.default_rng(0).normal(0, 4, gray.shape), 0, 255)
+    faded = (gray * 0.3 + 150).astype(np.uint8)
+
+    assert not _needs_denoise(gray) and not _needs_clahe(gray)
+    assert _needs_denoise(noisy.astype(np.uint8))
+    assert _needs_clahe(faded)
+
+
+def test_multipage_tiff_keeps_every_page():
+    pages = [_ruled_page(angle) for angle in (0.0, 4.0, -3.0)]
+    image_bytes = cv2.imencodemulti(".tiff", pages)[1].tobytes()
+
+    output = ImagePreprocessor().preprocess_form(image_bytes)
+
+    decoded = cv2.imdecodemulti(np.frombuffer(output, np.uint8), cv2.IMREAD_COLOR)[1]
+    assert len(decoded) == 3
+    assert all(abs(_rule_angle(page)) < 0.5 for page in decoded)
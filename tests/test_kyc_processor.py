@@ -0,0 +1,132 @@
+"""Tests for KYC extraction batching."""
+
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+from src.config import get_settings
+from src.models.schemas import ExtractedField
+from src.services.kyc_processor import KYCProcessor
+from src.services.openai_client import get_openai_client
+
+
+class _FakeCompletions:
+    """Echoes each document's text back as its customer_name."""
+
+    def __init__(self, drop_ids=()):
+        self.calls = []
+        self.drop_ids = set(drop_ids)
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        user_content = kwargs["messages"][1]["content"].split("\n\n", 1)[1]
+        if kwargs["messages"][0]["content"].find('{"documents"') != -1:
+            docs = json.loads(user_content)["documents"]
+            body = {
+                "results": [
+                    {"id": d["id"], "customer_name": d["text"]}
+                    for d in reversed(docs)  # Order must not matter
+                    if d["id"] not in self.drop_ids
+                ]
+            }
+        else:
+            body = {"customer_name": user_content}
+        message = SimpleNamespace(content=json.dumps(body))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    for var in (
+        "AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT",
+        "AZURE_DOCUMENT_INTELLIGENCE_KEY",
+        "AZURE_OPENAI_ENDPOINT",
+        "AZURE_OPENAI_API_KEY",
+    ):
+        monkeypatch.setenv(var, "https://example.test/")
+    get_settings.cache_clear()
+    get_openai_client.cache_clear()
+    yield KYCProcessor()
+    get_settings.cache_clear()
+    get_openai_client.cache_clear()
+
+
+def _doc(text: str) -> list[ExtractedField]:
+    return [ExtractedField(field_name="text_line", value=text, confidence=1.0)]
+
+
+def _install(processor, completions):
+    processor.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_forms_share_requests(processor):
+    """Concurrent process() calls are coalesced into max_batch-sized requests."""
+    completions = _FakeCompletions()
+    _install(processor, completions)
+
+    names = [f"Customer {i}" for i in range(processor.max_batch + 2)]
+    results = await asyncio.gather(*(processor.process(_doc(n), None) for n in names))
+
+    assert [r.customer_name.value for r in results] == names
+    assert len(completions.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_single_form_uses_plain_prompt(processor):
+    completions = _FakeCompletions()
+    _install(processor, completions)
+
+    result = await processor.process(_doc("Ahmed Ali"), None)
+
+    assert result.customer_name.value == "Ahmed Ali"
+    assert '{"documents"' not in completions.calls[0]["messages"][0]["content"]
+
+
+@pytest.mark.asyncio
+async def test_process_batch_missing_result_is_empty(processor):
+    """A document the model skipped gets no fields, not another's data."""
+    completions = _FakeCompletions(drop_ids={1})
+    _install(processor, completions)
+
+    results = await processor.process_batch([(_doc(n), None) for n in ("A", "B", "C")])
+
+    assert [r.customer_name.value if r.customer_name else None for r in results] == [
+        "A", None, "C"
+    ]
+    assert len(completions.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_repeated_form_served_from_cache(processor):
+    """The same form text is only sent to GPT-4o once."""
+    completions = _FakeCompletions()
+    _install(processor, completions)
+
+    first = await processor.process(_doc("Ahmed Ali"), None)
+    again = await processor.process_batch([(_doc("Ahmed Ali"), None), (_doc("Sara"), None)])
+
+    assert first.customer_name.value == again[0].customer_name.value == "Ahmed Ali"
+    assert again[1].customer_name.value == "Sara"
+    assert len(completions.calls) == 2
+
+
+class _HangingCompletions:
+    """Never answers, so the batch is still in flight at shutdown."""
+
+    async def create(self, **kwargs):
+        await asyncio.Event().wait()
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_waiting_callers(processor):
+    _install(processor, _HangingCompletions())
+    processor.max_batch = 1  # Second form stays queued behind the first
+
+    pending = [asyncio.create_task(processor.process(_doc(n), None)) for n in ("A", "B")]
+    await asyncio.sleep(processor.batch_wait_s + 0.05)
+    await processor.close()
+
+    results = await asyncio.gather(*pending, return_exceptions=True)
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    assert processor._worker is None